@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from main import create_news_card_image, export_metrics
+from output_store import atomic_path
+from log_utils import setup_logger
+from metrics import get_metrics
+
+metrics = get_metrics()
+
+# 진행 상황 로그 주기 (장)
+PROGRESS_INTERVAL = 100
+
+
+def read_records(stream):
+    """JSONL 스트림에서 (줄 번호, 레코드 또는 오류 메시지)를 한 줄씩 읽어 반환"""
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"JSON 파싱 오류: {e}"
+            continue
+        if not isinstance(record, dict) or not record.get('title') or not record.get('content'):
+            yield line_no, None, "필수 필드 누락: title, content"
+            continue
+        yield line_no, record, None
+
+
+def render_card(line_no, title, content, output_path):
+    """카드 한 장을 렌더링해 원자적으로 저장하고 결과를 반환 (워커 프로세스에서도 실행)"""
+    started = time.perf_counter()
+    try:
+        with atomic_path(output_path) as tmp_path:
+            create_news_card_image(title=title, content=content, output_path=tmp_path)
+        return {
+            "line": line_no,
+            "success": True,
+            "path": output_path,
+            "bytes": os.path.getsize(output_path),
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+    except Exception as e:
+        return {"line": line_no, "success": False, "path": output_path, "error": str(e)}
+
+
+def _disable_span_retention():
+    """트레이스 span 을 보관하지 않음 (카드 수에 비례해 메모리가 늘지 않도록, 워커 프로세스 초기화에도 사용)"""
+    metrics.max_spans = 0
+
+
+class BulkRenderer:
+    def __init__(self, output_dir, workers=1, manifest_path=None):
+        """분석이 끝난 {title, content} 레코드를 카드 이미지로 일괄 렌더링 (메모리 사용량 일정)"""
+        self.logger = logging.getLogger('NewsGenerator')
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.manifest_path = manifest_path or os.path.join(output_dir, "results.jsonl")
+        # 동시에 대기시키는 작업 수 상한 (입력 전체를 메모리에 올리지 않기 위함)
+        self.max_pending = self.workers * 4
+        self.rendered = 0
+        self.failed = 0
+        # 단계별 소요 시간 히스토그램과 카운터만 집계
+        _disable_span_retention()
+
+    def _output_path(self, line_no, record):
+        # 같은 id 가 여러 줄에 있어도 서로 덮어쓰지 않도록 줄 번호를 파일 이름에 포함
+        name = f"{line_no:08d}"
+        if record.get('id'):
+            name = f"{name}_{record['id']}".replace(os.sep, "_")
+        return os.path.join(self.output_dir, f"{name}.png")
+
+    def _record_result(self, manifest, result):
+        manifest.write(json.dumps(result, ensure_ascii=False) + "\n")
+        if result["success"]:
+            self.rendered += 1
+            metrics.inc("bulk_cards_total", status="success")
+            # 워커 프로세스의 지표는 부모로 전달되지 않으므로 카드별 소요 시간은 결과에서 기록
+            metrics.observe("bulk_card_seconds", result["seconds"])
+        else:
+            self.failed += 1
+            metrics.inc("bulk_cards_total", status="failure")
+            self.logger.error("%s번째 줄 처리 실패: %s", result["line"], result["error"])
+
+        done = self.rendered + self.failed
+        if done % PROGRESS_INTERVAL == 0:
+            elapsed = time.perf_counter() - self._started
+            self.logger.info("진행: %s장 처리 (%.1f장/초)", done, done / elapsed if elapsed else 0)
+
+    def _tasks(self, stream, manifest):
+        """렌더링할 작업만 넘기고, 입력 오류는 바로 결과 파일에 기록"""
+        for line_no, record, error in read_records(stream):
+            if error:
+                self._record_result(manifest, {"line": line_no, "success": False, "error": error})
+                continue
+            yield line_no, record['title'], record['content'], self._output_path(line_no, record)
+
+    def run(self, stream):
+        """입력 스트림 전체를 렌더링하고 처리 결과 요약을 반환"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._started = time.perf_counter()
+
+        try:
+            with open(self.manifest_path, "w", encoding="utf-8") as manifest:
+                if self.workers == 1:
+                    for task in self._tasks(stream, manifest):
+                        self._record_result(manifest, render_card(*task))
+                else:
+                    with ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_disable_span_retention) as executor:
+                        pending = set()
+                        for task in self._tasks(stream, manifest):
+                            if len(pending) >= self.max_pending:
+                                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                                for future in done:
+                                    self._record_result(manifest, future.result())
+                            pending.add(executor.submit(render_card, *task))
+                        for future in pending:
+                            self._record_result(manifest, future.result())
+        finally:
+            export_metrics()
+
+        elapsed = time.perf_counter() - self._started
+        throughput = self.rendered / elapsed if elapsed else 0
+        self.logger.info("일괄 렌더링 완료: 성공 %s장, 실패 %s장, %.1f초 (%.1f장/초)",
+                         self.rendered, self.failed, elapsed, throughput)
+        self.logger.info("결과 파일: %s", self.manifest_path)
+        return {
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "seconds": round(elapsed, 3),
+            "cards_per_second": round(throughput, 2),
+            "manifest": self.manifest_path,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL({title, content}) 입력으로 카드 뉴스 이미지를 일괄 생성")
+    parser.add_argument("input", nargs="?", default="-", help="입력 JSONL 파일 (기본값: 표준 입력)")
+    parser.add_argument("--output-dir", default=None,
+                        help="이미지 저장 폴더 (기본값: output/bulk/<실행시각>)")
+    parser.add_argument("--workers", type=int, default=1, help="렌더링 프로세스 수 (기본값: 1)")
+    parser.add_argument("--manifest", default=None, help="결과 파일 경로 (기본값: <output-dir>/results.jsonl)")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    output_dir = args.output_dir or os.path.join("output", "bulk", datetime.now().strftime('%Y%m%d_%H%M%S'))
+    renderer = BulkRenderer(output_dir, workers=args.workers, manifest_path=args.manifest)
+
+    try:
+        if args.input == "-":
+            summary = renderer.run(sys.stdin)
+        else:
+            with open(args.input, encoding="utf-8") as stream:
+                summary = renderer.run(stream)
+        print(json.dumps(summary, ensure_ascii=False))
+    except Exception as e:
+        logger.error("일괄 렌더링 중 오류 발생: %s", e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
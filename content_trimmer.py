@@ -0,0 +1,184 @@
+import re
+import math
+
+# 사이트 내비게이션/메뉴에 자주 등장하는 단어 (대문자로 시작하는 단어가 연속으로 나열되면 본문이 아닌 것으로 판단)
+NAV_WORDS = {
+    "markets", "market", "stocks", "stock", "indices", "commodities", "cryptocurrencies", "crypto",
+    "currencies", "etfs", "news", "bonds", "funds", "economy", "business", "tech", "technology",
+    "politics", "opinion", "video", "videos", "podcasts", "home", "menu", "search", "subscribe",
+    "login", "newsletters", "advertising", "policies", "finance", "investing", "sports", "lifestyle",
+}
+
+# 최소 몇 단어가 연속으로 나열되어야 메뉴로 볼지
+NAV_RUN_LENGTH = 4
+
+# 본문과 무관한 상투 문구
+BOILERPLATE_PATTERNS = [
+    re.compile(r"https?://\S+"),
+    re.compile(r"\S+@\S+\.\w+"),
+    re.compile(r"Advertising Policies", re.IGNORECASE),
+    re.compile(r"All rights reserved\.?", re.IGNORECASE),
+    re.compile(r"(Sign up|Subscribe) (for|to) (our|the) newsletter[^.]*\.?", re.IGNORECASE),
+    re.compile(r"(Click|Tap) here to [^.]*\.?", re.IGNORECASE),
+    re.compile(r"This (article|story) (was|has been) (updated|corrected)[^.]*\.?", re.IGNORECASE),
+    # 저작권 표기는 하단 문구 형태만 제거 (본문 속 "copyright" 단어는 유지)
+    re.compile(r"(Copyright\s*)?(©|\(c\)(?=\s*\d{4}))[^.\n]*\.?", re.IGNORECASE),
+    re.compile(r"Copyright\s+\d{4}\b[^.\n]*\.?", re.IGNORECASE),
+    re.compile(r"(?i:Copyright)\s+(?:[A-Z][\w&'-]*\s+){0,4}(?:Inc|Ltd|LLC|Corp|Corporation|Co|Company|Group|Media)\b\.?"),
+    re.compile(r"[ⓒ©][^.\n]*?무단\s*전재(\s*(및|&)\s*재배포)?\s*금지"),
+    re.compile(r"무단\s*전재\s*(및|&)\s*재배포\s*금지"),
+]
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。])\s+")
+_WORD = re.compile(r"[0-9A-Za-z가-힣]+")
+
+# 빈도 계산에서 제외할 기능어
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "at", "by", "from", "as",
+    "is", "are", "was", "were", "be", "been", "it", "its", "that", "this", "these", "those", "said",
+    "says", "their", "they", "has", "have", "had", "but", "not", "will", "would", "can", "could",
+    "및", "등", "이", "그", "저", "것", "수", "더", "또", "위해", "대한", "있다", "했다", "밝혔다",
+}
+
+# 기사 앞부분 문장에 주는 가중치 (리드 문장이 핵심인 경우가 많음)
+POSITION_WEIGHTS = (1.5, 1.3, 1.15)
+
+
+def estimate_tokens(text):
+    """Gemini 토큰 수 추정 (한글 등 비ASCII 문자는 1자당 1토큰, ASCII는 4자당 1토큰)"""
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def _is_nav_word(word):
+    token = word.strip(".,:;|·-")
+    return token[:1].isupper() and token.lower() in NAV_WORDS
+
+
+def _starts_new_sentence(word):
+    return word.lstrip("\"'“‘(")[:1].isupper()
+
+
+def _flush_nav_run(run, next_word, kept):
+    """메뉴 단어 나열(run)을 메뉴로 볼지 판단해 본문(kept)에 남기거나 버림
+
+    쉼표/마침표 없이 NAV_RUN_LENGTH 개 이상 이어지고, 뒤에 문장 경계·본문 끝·대문자 단어가 오는 경우만 메뉴로 본다.
+    """
+    if len(run) >= NAV_RUN_LENGTH:
+        end = run[-1][-1]
+        if end in ".!?":
+            # 버린 나열이 문장 끝이었다면 앞 단어에 종결 부호를 남겨 문장이 합쳐지지 않게 함
+            if kept and kept[-1][-1] not in ".!?":
+                kept[-1] += end
+            return
+        if end not in ",;:" and (next_word is None or _starts_new_sentence(next_word)):
+            return
+    kept.extend(run)
+
+
+def strip_boilerplate(text):
+    """메뉴 나열과 상투 문구를 제거"""
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub(" ", text)
+
+    words = text.split()
+    kept = []
+    run = []
+    for word in words:
+        if _is_nav_word(word):
+            run.append(word)
+            if word[-1] in ".,;:!?":
+                # 구두점이 붙은 단어에서 나열이 끝남 ("Markets, Stocks, Bonds" 같은 본문 속 열거는 길이 1의 나열들이 됨)
+                _flush_nav_run(run, None, kept)
+                run = []
+            continue
+        if run:
+            _flush_nav_run(run, word, kept)
+            run = []
+        kept.append(word)
+    if run:
+        _flush_nav_run(run, None, kept)
+
+    return " ".join(kept)
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text) if sentence.strip()]
+
+
+def _words(text):
+    return [word.lower() for word in _WORD.findall(text)]
+
+
+def dedupe_sentences(sentences):
+    """대소문자/문장부호만 다른 중복 문장을 제거 (처음 등장한 문장 유지)"""
+    seen = set()
+    unique = []
+    for sentence in sentences:
+        key = " ".join(_words(sentence))
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        unique.append(sentence)
+    return unique
+
+
+def _score_sentences(title, sentences):
+    """단어 빈도, 제목과의 겹침, 문장 위치로 문장별 중요도 점수 계산"""
+    frequency = {}
+    for sentence in sentences:
+        for word in _words(sentence):
+            if word not in STOPWORDS and len(word) > 1:
+                frequency[word] = frequency.get(word, 0) + 1
+    title_words = {word for word in _words(title) if word not in STOPWORDS}
+
+    scores = []
+    for position, sentence in enumerate(sentences):
+        words = [word for word in _words(sentence) if word not in STOPWORDS and len(word) > 1]
+        if not words:
+            scores.append(0.0)
+            continue
+        score = sum(frequency[word] for word in words) / math.sqrt(len(words))
+        score *= 1 + len(title_words.intersection(words)) / (len(title_words) or 1)
+        if position < len(POSITION_WEIGHTS):
+            score *= POSITION_WEIGHTS[position]
+        scores.append(score)
+    return scores
+
+
+def trim_content(title, content, token_budget):
+    """본문에서 상투 문구와 중복 문장을 제거하고, 토큰 예산 안에서 중요 문장만 원래 순서대로 남김
+
+    (정리된 본문, 원본 토큰 수, 정리 후 토큰 수)를 반환한다.
+    """
+    original_tokens = estimate_tokens(content)
+    sentences = dedupe_sentences(split_sentences(strip_boilerplate(content)))
+    if not sentences:
+        return content, original_tokens, original_tokens
+
+    cleaned = " ".join(sentences)
+    cleaned_tokens = estimate_tokens(cleaned)
+    if not token_budget or cleaned_tokens <= token_budget:
+        return cleaned, original_tokens, cleaned_tokens
+
+    # 점수가 높은 문장부터 예산이 허락하는 만큼 선택
+    scores = _score_sentences(title, sentences)
+    ranked = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)
+    selected = []
+    used = 0
+    for i in ranked:
+        tokens = estimate_tokens(sentences[i]) + 1
+        if used + tokens > token_budget:
+            continue
+        selected.append(i)
+        used += tokens
+
+    if not selected:
+        # 한 문장도 예산에 들어가지 않으면 가장 중요한 문장을 예산 길이로 자름
+        best = sentences[ranked[0]]
+        while best and estimate_tokens(best) > token_budget:
+            best = best[:int(len(best) * 0.9)]
+        trimmed = best
+    else:
+        trimmed = " ".join(sentences[i] for i in sorted(selected))
+    return trimmed, original_tokens, estimate_tokens(trimmed)
@@ -0,0 +1,229 @@
+import os
+import hashlib
+import mimetypes
+import threading
+import time
+import logging
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+# 형식은 올바르지만 파일 크기를 벗어난 Range (416 응답)
+_UNSATISFIABLE = object()
+
+
+class _ImageEntry:
+    """등록된 이미지 한 장의 정보 (메모리 또는 디스크)"""
+
+    def __init__(self, file_path=None, data=None, content_type=None):
+        self.file_path = file_path
+        self.data = data
+        self.content_type = content_type or mimetypes.guess_type(file_path or "")[0] or "application/octet-stream"
+
+        if data is not None:
+            self.size = len(data)
+            self.mtime = int(os.path.getmtime(file_path)) if file_path and os.path.exists(file_path) else None
+            self.etag = f'"{hashlib.md5(data).hexdigest()}"'
+        else:
+            stat = os.stat(file_path)
+            self.size = stat.st_size
+            self.mtime = int(stat.st_mtime)
+            self.etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+        if self.mtime is None:
+            self.mtime = int(time.time())
+
+    def read(self, start, end):
+        """start~end(포함) 바이트 구간을 반환"""
+        if self.data is not None:
+            return self.data[start:end + 1]
+        with open(self.file_path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+
+class _ImageRequestHandler(BaseHTTPRequestHandler):
+    # keep-alive 지원을 위해 HTTP/1.1 사용
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        self.server.image_server.logger.debug("이미지 서버 요청: " + format, *args)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _serve(self, send_body):
+        path = unquote(urlparse(self.path).path)
+        entry = self.server.image_server.get(path)
+        if entry is None:
+            self._send_empty(404)
+            return
+
+        last_modified = formatdate(entry.mtime, usegmt=True)
+        common_headers = {
+            "ETag": entry.etag,
+            "Last-Modified": last_modified,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "public, max-age=86400",
+        }
+
+        # 조건부 요청 처리 (If-None-Match 우선)
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*" or entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+                self._send_empty(304, common_headers)
+                return
+        elif self.headers.get("If-Modified-Since"):
+            try:
+                since = parsedate_to_datetime(self.headers["If-Modified-Since"])
+                if entry.mtime <= since.timestamp():
+                    self._send_empty(304, common_headers)
+                    return
+            except (TypeError, ValueError):
+                pass
+
+        start, end = 0, entry.size - 1
+        status = 200
+        range_header = self.headers.get("Range")
+        if range_header and entry.size > 0:
+            byte_range = self._parse_range(range_header, entry.size)
+            if byte_range is _UNSATISFIABLE:
+                self._send_empty(416, {"Content-Range": f"bytes */{entry.size}"})
+                return
+            # 해석할 수 없는 Range 는 무시하고 전체 파일로 응답 (RFC 9110)
+            if byte_range is not None:
+                start, end = byte_range
+                status = 206
+
+        self.send_response(status)
+        for key, value in common_headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", entry.content_type)
+        self.send_header("Content-Length", str(max(end - start + 1, 0)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{entry.size}")
+        self.end_headers()
+
+        if send_body and entry.size > 0:
+            self.wfile.write(entry.read(start, end))
+
+    @staticmethod
+    def _parse_range(range_header, size):
+        """단일 바이트 구간 Range 헤더를 (start, end)로 변환
+
+        해석할 수 없거나 지원하지 않는 형식(다중 구간 등)이면 None, 파일 크기를 벗어나면 _UNSATISFIABLE.
+        """
+        unit, _, spec = range_header.partition("=")
+        if unit.strip() != "bytes" or "," in spec:
+            return None
+        first, _, last = spec.strip().partition("-")
+        if not (first.isdecimal() or first == "") or not (last.isdecimal() or last == "") or first == last == "":
+            return None
+        if first == "":
+            # 마지막 N 바이트 (bytes=-N)
+            length = int(last)
+            if length == 0:
+                return _UNSATISFIABLE
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and start > end:
+            return None
+        if start >= size:
+            return _UNSATISFIABLE
+        return start, min(end, size - 1)
+
+
+class ImageServer:
+    def __init__(self, host="0.0.0.0", port=8000, public_url=None, url_prefix="/card-news-generator"):
+        """렌더링된 카드 이미지를 직접 서빙하는 내장 정적 서버"""
+        self.logger = logging.getLogger('NewsGenerator')
+        self.host = host
+        self.port = port
+        # 외부(Instagram)에서 이 서버에 접근할 때 사용하는 주소 (리버스 프록시 등)
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.url_prefix = "/" + url_prefix.strip("/") if url_prefix.strip("/") else ""
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def _url_path(self, path):
+        return f"{self.url_prefix}/{path.replace(os.sep, '/').lstrip('/')}"
+
+    def _base_url(self):
+        return self.public_url or f"http://{self.host}:{self.port}"
+
+    def url_for(self, path):
+        """파일 경로에 해당하는 외부 접근 URL"""
+        return f"{self._base_url()}{self._url_path(path)}"
+
+    def register(self, path, data=None, content_type=None):
+        """이미지를 등록하고 외부 접근 URL을 반환 (data가 있으면 메모리에서 서빙)"""
+        entry = _ImageEntry(file_path=path, data=data, content_type=content_type)
+        url_path = self._url_path(path)
+        with self._lock:
+            self._entries[url_path] = entry
+        self.logger.info("이미지 서버 등록: %s (%s bytes)", url_path, entry.size)
+        return self.url_for(path)
+
+    def unregister(self, path):
+        """등록된 이미지를 제거"""
+        with self._lock:
+            self._entries.pop(self._url_path(path), None)
+
+    def get(self, url_path):
+        with self._lock:
+            return self._entries.get(url_path)
+
+    def is_registered(self, url):
+        """URL이 이 서버에 등록되어 바로 서빙 가능한지 확인"""
+        base_url = self._base_url()
+        if not self.is_running or not url.startswith(base_url):
+            return False
+        return self.get(unquote(urlparse(url[len(base_url):]).path)) is not None
+
+    @property
+    def is_running(self):
+        return self._server is not None
+
+    def start(self):
+        """백그라운드 스레드에서 서버 시작"""
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), _ImageRequestHandler)
+        self._server.daemon_threads = True
+        self._server.image_server = self
+        # port=0 으로 지정한 경우 실제 할당된 포트로 갱신
+        self.port = self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ImageServer", daemon=True)
+        self._thread.start()
+        self.logger.info("이미지 서버 시작: http://%s:%s%s/", self.host, self.port, self.url_prefix)
+
+    def stop(self):
+        """서버 종료"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+        self.logger.info("이미지 서버 종료")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -2,52 +2,82 @@ import os
 import requests
 from dotenv import load_dotenv
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import time
 import logging
+from metrics import get_metrics
+import rate_limit
 
 # 환경 변수 로드
 load_dotenv()
 
 class InstagramAPI:
-    def __init__(self):
+    # 컨테이너 처리 상태 (status_code)
+    STATUS_FINISHED = "FINISHED"
+    STATUS_IN_PROGRESS = "IN_PROGRESS"
+    FAILED_STATUSES = ("ERROR", "EXPIRED")
+    # 상태 조회 요청 한 번의 최대 대기 시간 (초)
+    STATUS_REQUEST_TIMEOUT = 10
+
+    def __init__(self, base_url=None, status_timeout=60, status_initial_delay=1, status_max_delay=8,
+                 image_server=None, access_token=None, account_id=None):
         """Initialize Instagram API with credentials from environment variables"""
         self.logger = logging.getLogger('NewsGenerator')
-        self.access_token = os.getenv("INSTAGRAM_ACCESS_TOKEN")
-        self.account_id = os.getenv("INSTAGRAM_ACCOUNT_ID")
+        self.metrics = get_metrics()
+        # 계정별 에디션 실행 시 자격 증명을 직접 지정할 수 있음
+        self.access_token = access_token or os.getenv("INSTAGRAM_ACCESS_TOKEN")
+        self.account_id = account_id or os.getenv("INSTAGRAM_ACCOUNT_ID")
         
         if not self.access_token or not self.account_id:
             self.logger.error("Instagram 자격 증명이 설정되지 않았습니다.")
             raise ValueError("Instagram 자격 증명이 설정되지 않았습니다. .env 파일을 확인해주세요.")
         
         self.api_version = "v18.0"
-        self.base_url = f"https://graph.facebook.com/{self.api_version}"
+        # 로컬 mock Graph API 등으로 교체할 수 있도록 호스트를 설정 가능하게 둠
+        graph_host = base_url or os.getenv("INSTAGRAM_GRAPH_URL", "https://graph.facebook.com")
+        self.base_url = f"{graph_host.rstrip('/')}/{self.api_version}"
+
+        # 컨테이너 준비 상태 폴링 설정 (전체 제한 시간과 적응형 백오프 간격, 초 단위)
+        self.status_timeout = status_timeout
+        self.status_initial_delay = status_initial_delay
+        self.status_max_delay = status_max_delay
+
+        # 내장 이미지 서버에 등록된 URL은 외부 접근 확인(HEAD 폴링)을 생략
+        self.image_server = image_server
 
     def _test_image_url(self, image_url, max_retries=5, delay=2):
         """이미지 URL 접근성 테스트를 재시도하는 헬퍼 함수"""
+        if self.image_server is not None and self.image_server.is_registered(image_url):
+            self.metrics.inc("cache_hits_total", cache="image_server")
+            self.logger.info("내장 이미지 서버에 등록된 URL - 접근성 확인 생략")
+            return True
+        
         for attempt in range(max_retries):
             try:
                 test_response = requests.head(image_url)
-                self.logger.info(f"시도 {attempt + 1}/{max_retries} - HTTP 상태: {test_response.status_code}")
-                self.logger.info(f"Content-Type: {test_response.headers.get('content-type', 'unknown')}")
+                self.logger.info("시도 %s/%s - HTTP 상태: %s", attempt + 1, max_retries, test_response.status_code)
+                self.logger.info("Content-Type: %s", test_response.headers.get('content-type', 'unknown'))
                 
                 if test_response.status_code == 200:
                     return True
                     
                 if attempt < max_retries - 1:
-                    self.logger.info(f"{delay}초 후 재시도...")
+                    self.metrics.inc("retries_total", operation="image_url_probe")
+                    self.logger.info("%s초 후 재시도...", delay)
                     time.sleep(delay)
                     
             except Exception as e:
-                self.logger.error(f"시도 {attempt + 1}/{max_retries} - 실패: {str(e)}")
+                self.logger.error("시도 %s/%s - 실패: %s", attempt + 1, max_retries, e)
                 if attempt < max_retries - 1:
-                    self.logger.info(f"{delay}초 후 재시도...")
+                    self.metrics.inc("retries_total", operation="image_url_probe")
+                    self.logger.info("%s초 후 재시도...", delay)
                     time.sleep(delay)
         
         return False
 
     def _create_single_media(self, image_url, caption=""):
         """단일 이미지 미디어 컨테이너 생성"""
-        self.logger.info(f"이미지 URL 확인: {image_url}")
+        self.logger.info("이미지 URL 확인: %s", image_url)
         
         if not self._test_image_url(image_url):
             self.logger.error("이미지 URL에 접근할 수 없습니다.")
@@ -63,26 +93,27 @@ class InstagramAPI:
         self.logger.info("Instagram API 요청 시작")
         
         try:
-            response = requests.post(container_url, params=container_params)
-            self.logger.info(f"API 응답 상태 코드: {response.status_code}")
-            
-            if response.status_code != 200:
-                self.logger.error(f"에러 응답: {response.text}")
-            else:
-                self.logger.info(f"성공 응답: {response.json()}")
+            with rate_limit.limit("graph_api"), self.metrics.span("graph_api.create_media"):
+                response = requests.post(container_url, params=container_params)
+                self.logger.info("API 응답 상태 코드: %s", response.status_code)
+                
+                if response.status_code != 200:
+                    self.logger.error("에러 응답: %s", response.text)
+                else:
+                    self.logger.info("성공 응답: %s", response.text)
                 
-            response.raise_for_status()
+                response.raise_for_status()
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"API 요청 실패: {str(e)}")
+            self.logger.error("API 요청 실패: %s", e)
             if hasattr(e, 'response') and e.response is not None:
-                self.logger.error(f"에러 응답: {e.response.text}")
+                self.logger.error("에러 응답: %s", e.response.text)
             raise
 
     def _create_carousel_item(self, image_url):
         """캐러셀 아이템 생성"""
-        self.logger.info(f"이미지 URL 확인: {image_url}")
+        self.logger.info("이미지 URL 확인: %s", image_url)
         
         if not self._test_image_url(image_url):
             self.logger.error("이미지 URL에 접근할 수 없습니다.")
@@ -98,21 +129,22 @@ class InstagramAPI:
         self.logger.info("Instagram API 요청 시작")
         
         try:
-            response = requests.post(container_url, params=container_params)
-            self.logger.info(f"API 응답 상태 코드: {response.status_code}")
-            
-            if response.status_code != 200:
-                self.logger.error(f"에러 응답: {response.text}")
-            else:
-                self.logger.info(f"성공 응답: {response.json()}")
+            with rate_limit.limit("graph_api"), self.metrics.span("graph_api.create_carousel_item"):
+                response = requests.post(container_url, params=container_params)
+                self.logger.info("API 응답 상태 코드: %s", response.status_code)
                 
-            response.raise_for_status()
+                if response.status_code != 200:
+                    self.logger.error("에러 응답: %s", response.text)
+                else:
+                    self.logger.info("성공 응답: %s", response.text)
+                
+                response.raise_for_status()
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"API 요청 실패: {str(e)}")
+            self.logger.error("API 요청 실패: %s", e)
             if hasattr(e, 'response') and e.response is not None:
-                self.logger.error(f"에러 응답: {e.response.text}")
+                self.logger.error("에러 응답: %s", e.response.text)
             raise
 
     def _create_carousel_container(self, children_ids, caption=""):
@@ -128,23 +160,95 @@ class InstagramAPI:
         self.logger.info("Instagram API 요청 시작")
         
         try:
-            response = requests.post(container_url, params=container_params)
-            self.logger.info(f"API 응답 상태 코드: {response.status_code}")
-            
-            if response.status_code != 200:
-                self.logger.error(f"에러 응답: {response.text}")
-            else:
-                self.logger.info(f"성공 응답: {response.json()}")
+            with rate_limit.limit("graph_api"), self.metrics.span("graph_api.create_carousel_container"):
+                response = requests.post(container_url, params=container_params)
+                self.logger.info("API 응답 상태 코드: %s", response.status_code)
+                
+                if response.status_code != 200:
+                    self.logger.error("에러 응답: %s", response.text)
+                else:
+                    self.logger.info("성공 응답: %s", response.text)
                 
-            response.raise_for_status()
+                response.raise_for_status()
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"API 요청 실패: {str(e)}")
+            self.logger.error("API 요청 실패: %s", e)
             if hasattr(e, 'response') and e.response is not None:
-                self.logger.error(f"에러 응답: {e.response.text}")
+                self.logger.error("에러 응답: %s", e.response.text)
             raise
 
+    def _get_container_status(self, container_id, timeout=STATUS_REQUEST_TIMEOUT):
+        """미디어 컨테이너의 처리 상태(status_code) 조회"""
+        status_url = f"{self.base_url}/{container_id}"
+        status_params = {
+            "access_token": self.access_token,
+            "fields": "status_code"
+        }
+
+        try:
+            with rate_limit.limit("graph_api"), self.metrics.span("graph_api.container_status"):
+                response = requests.get(status_url, params=status_params, timeout=timeout)
+                response.raise_for_status()
+            return response.json().get("status_code", self.STATUS_IN_PROGRESS)
+
+        except requests.exceptions.HTTPError as e:
+            # 4xx(토큰 만료, 권한 없음 등)는 다시 조회해도 결과가 같으므로 바로 실패 처리
+            if e.response is not None and e.response.status_code < 500:
+                self.logger.error("컨테이너 %s 상태 조회 실패: %s", container_id, e.response.text)
+                raise
+            self.logger.warning("컨테이너 %s 상태 조회 실패: %s", container_id, e)
+            return self.STATUS_IN_PROGRESS
+
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ValueError) as e:
+            # 일시적인 조회 실패는 아직 처리 중인 것으로 보고 다음 폴링에서 다시 확인
+            self.logger.warning("컨테이너 %s 상태 조회 실패: %s", container_id, e)
+            return self.STATUS_IN_PROGRESS
+
+    def _wait_for_containers(self, container_ids, deadline=None):
+        """모든 컨테이너가 FINISHED 상태가 될 때까지 병렬로 상태를 확인
+
+        deadline(time.monotonic 기준)을 넘기면 여러 번 호출해도 같은 제한 시간을 공유한다.
+        """
+        pending = list(container_ids)
+        if deadline is None:
+            deadline = time.monotonic() + self.status_timeout
+        delay = self.status_initial_delay
+        attempt = 0
+
+        with ThreadPoolExecutor(max_workers=min(len(pending), 10) or 1) as executor:
+            while pending:
+                attempt += 1
+                # 상태 조회 한 번이 전체 제한 시간을 넘겨 멈춰 있지 않도록 요청별 timeout 지정
+                timeout = max(min(deadline - time.monotonic(), self.STATUS_REQUEST_TIMEOUT), 1)
+                statuses = list(executor.map(
+                    lambda container_id: self._get_container_status(container_id, timeout), pending))
+
+                still_pending = []
+                for container_id, status in zip(pending, statuses):
+                    if status in self.FAILED_STATUSES:
+                        self.logger.error("컨테이너 %s 처리 실패: %s", container_id, status)
+                        raise Exception(f"미디어 컨테이너 처리 실패 ({container_id}: {status})")
+                    if status != self.STATUS_FINISHED:
+                        still_pending.append(container_id)
+                pending = still_pending
+
+                if not pending:
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.logger.error("컨테이너 처리 대기 시간 초과: %s", ', '.join(pending))
+                    raise TimeoutError(f"미디어 컨테이너 처리 대기 시간 초과 ({self.status_timeout}초)")
+
+                wait = min(delay, remaining)
+                self.metrics.inc("retries_total", operation="container_status")
+                self.logger.info("상태 확인 %s회차 - 처리 중 %s개, %.1f초 후 재확인...", attempt, len(pending), wait)
+                time.sleep(wait)
+                delay = min(delay * 2, self.status_max_delay)
+
+        self.logger.info("컨테이너 %s개 처리 완료 (상태 확인 %s회)", len(container_ids), attempt)
+
     def _publish_media(self, creation_id):
         """미디어 게시"""
         publish_url = f"{self.base_url}/{self.account_id}/media_publish"
@@ -156,21 +260,22 @@ class InstagramAPI:
         self.logger.info("Instagram API 요청 시작")
         
         try:
-            response = requests.post(publish_url, params=publish_params)
-            self.logger.info(f"API 응답 상태 코드: {response.status_code}")
-            
-            if response.status_code != 200:
-                self.logger.error(f"에러 응답: {response.text}")
-            else:
-                self.logger.info(f"성공 응답: {response.json()}")
+            with rate_limit.limit("graph_api"), self.metrics.span("graph_api.media_publish"):
+                response = requests.post(publish_url, params=publish_params)
+                self.logger.info("API 응답 상태 코드: %s", response.status_code)
                 
-            response.raise_for_status()
+                if response.status_code != 200:
+                    self.logger.error("에러 응답: %s", response.text)
+                else:
+                    self.logger.info("성공 응답: %s", response.text)
+                
+                response.raise_for_status()
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"API 요청 실패: {str(e)}")
+            self.logger.error("API 요청 실패: %s", e)
             if hasattr(e, 'response') and e.response is not None:
-                self.logger.error(f"에러 응답: {e.response.text}")
+                self.logger.error("에러 응답: %s", e.response.text)
             raise
         
     def post_image(self, image_paths, caption=None):
@@ -179,20 +284,30 @@ class InstagramAPI:
             if isinstance(image_paths, str):
                 image_paths = [image_paths]
 
+            # 캐러셀 아이템과 최종 컨테이너의 상태 확인이 하나의 제한 시간을 공유
+            # (아이템/컨테이너 생성에 걸린 시간은 제외하고 상태 확인 시간만 계산)
+            deadline = None
+
             if len(image_paths) > 1:
-                self.logger.info(f"캐러셀 이미지 업로드 시작 (총 {len(image_paths)}장)")
+                self.logger.info("캐러셀 이미지 업로드 시작 (총 %s장)", len(image_paths))
                 
                 children_ids = []
                 for i, image_url in enumerate(image_paths, 1):
-                    self.logger.info(f"이미지 {i}/{len(image_paths)} 처리 중...")
+                    self.logger.info("이미지 %s/%s 처리 중...", i, len(image_paths))
                     response = self._create_carousel_item(image_url)
                     if "id" not in response:
-                        self.logger.error(f"캐러셀 아이템 {i} 생성 실패")
+                        self.logger.error("캐러셀 아이템 %s 생성 실패", i)
                         return {"success": False, "error": f"캐러셀 아이템 {i} 생성 실패"}
                     children_ids.append(response["id"])
                 
+                self.logger.info("캐러셀 아이템 처리 상태 확인 중...")
+                deadline = time.monotonic() + self.status_timeout
+                self._wait_for_containers(children_ids, deadline)
+                
                 self.logger.info("캐러셀 컨테이너 생성 중...")
+                created = time.monotonic()
                 container = self._create_carousel_container(children_ids, caption)
+                deadline += time.monotonic() - created
                 
             else:
                 self.logger.info("단일 이미지 업로드 시작")
@@ -202,6 +317,11 @@ class InstagramAPI:
                 self.logger.error("미디어 컨테이너 ID를 받지 못했습니다")
                 return {"success": False, "error": "미디어 컨테이너 ID를 받지 못했습니다"}
             
+            self.logger.info("미디어 컨테이너 처리 상태 확인 중...")
+            if deadline is None:
+                deadline = time.monotonic() + self.status_timeout
+            self._wait_for_containers([container["id"]], deadline)
+            
             self.logger.info("Instagram에 게시물 발행 중...")
             publish_data = self._publish_media(container["id"])
             
@@ -225,7 +345,7 @@ class InstagramAPI:
                         error_message = f"{error_data['error'].get('message', str(e))}"
                 except ValueError:
                     pass
-            self.logger.error(f"Instagram 포스팅 중 오류 발생: {error_message}")
+            self.logger.error("Instagram 포스팅 중 오류 발생: %s", error_message)
             return {"success": False, "error": f"Instagram 포스팅 중 오류 발생: {error_message}"}
 
 
@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+from datetime import datetime
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 한 줄 로그의 최대 길이 (API 응답 전체 등 큰 페이로드는 잘라서 기록)
+DEFAULT_MAX_MESSAGE_LENGTH = 2000
+
+
+def _truncate(message, max_length):
+    if max_length and len(message) > max_length:
+        return f"{message[:max_length]}... (총 {len(message)}자 중 {max_length}자만 기록)"
+    return message
+
+
+class TruncatingFormatter(logging.Formatter):
+    """메시지 길이를 제한하는 텍스트 포맷터"""
+
+    def __init__(self, fmt=LOG_FORMAT, max_length=DEFAULT_MAX_MESSAGE_LENGTH):
+        super().__init__(fmt)
+        self.max_length = max_length
+
+    def formatMessage(self, record):
+        record.message = _truncate(record.message, self.max_length)
+        return super().formatMessage(record)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """한 줄에 JSON 객체 하나씩 기록하는 포맷터"""
+
+    def __init__(self, max_length=DEFAULT_MAX_MESSAGE_LENGTH):
+        super().__init__()
+        self.max_length = max_length
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": _truncate(record.getMessage(), self.max_length),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """메시지 포맷팅을 호출 스레드가 아닌 백그라운드 writer 에서 수행하는 QueueHandler"""
+
+    def prepare(self, record):
+        # 기본 구현은 여기서 메시지를 포맷팅하므로, 레코드를 그대로 넘겨 listener 가 처리하도록 함
+        return record
+
+
+def setup_logger(name='NewsGenerator', log_dir="log", json_format=None, use_queue=None,
+                 max_message_length=None):
+    """로깅 설정
+
+    - use_queue: 큐 기반 핸들러 + 백그라운드 writer 사용 (기본값: 환경 변수 LOG_QUEUE, 미설정 시 사용)
+    - json_format: JSON Lines 형식으로 파일 기록 (기본값: 환경 변수 LOG_FORMAT=json)
+    - max_message_length: 한 줄 최대 길이 (기본값: 환경 변수 LOG_MAX_MESSAGE_LENGTH 또는 2000)
+
+    여러 번 호출해도 핸들러가 중복으로 추가되지 않는다.
+    """
+    if json_format is None:
+        json_format = os.getenv("LOG_FORMAT", "").lower() == "json"
+    if use_queue is None:
+        use_queue = os.getenv("LOG_QUEUE", "1").lower() not in ("0", "false", "no")
+    if max_message_length is None:
+        max_message_length = int(os.getenv("LOG_MAX_MESSAGE_LENGTH", DEFAULT_MAX_MESSAGE_LENGTH))
+
+    # 로거 생성 (이전 설정이 있으면 정리 후 다시 구성)
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    shutdown_logger(logger)
+
+    # 로그 폴더 생성
+    os.makedirs(log_dir, exist_ok=True)
+
+    # 오늘 날짜로 로그 파일명 생성
+    today = datetime.now().strftime('%Y%m%d')
+    extension = "jsonl" if json_format else "log"
+    log_file = os.path.join(log_dir, f'news_generator_{today}.{extension}')
+
+    # 파일 핸들러 설정 (최대 10MB, 백업 5개)
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=10*1024*1024,  # 10MB
+        backupCount=5,
+        encoding='utf-8'
+    )
+    file_handler.setLevel(logging.INFO)
+
+    # 콘솔 핸들러 설정
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+
+    # 포맷터 설정
+    if json_format:
+        file_handler.setFormatter(JsonLinesFormatter(max_message_length))
+    else:
+        file_handler.setFormatter(TruncatingFormatter(max_length=max_message_length))
+    console_handler.setFormatter(TruncatingFormatter(max_length=max_message_length))
+
+    if use_queue:
+        # 호출 스레드는 큐에 레코드만 넣고, 포맷팅과 파일/콘솔 I/O는 백그라운드 스레드가 처리
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        listener.start()
+        logger.addHandler(_DeferredQueueHandler(log_queue))
+        logger._queue_listener = listener
+    else:
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+
+    return logger
+
+
+def shutdown_logger(logger=None):
+    """백그라운드 writer 를 멈춰 남은 로그를 모두 기록하고 핸들러를 제거"""
+    logger = logger or logging.getLogger('NewsGenerator')
+    listener = getattr(logger, "_queue_listener", None)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        logger._queue_listener = None
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+# 종료 시 큐에 남은 로그를 flush
+atexit.register(shutdown_logger)
@@ -7,9 +7,49 @@ from news_analyzer import NewsAnalyzer
 import hashlib
 from datetime import datetime
 from instagram_post import InstagramAPI
+from image_server import ImageServer
+from output_store import OutputStore
+from metrics import get_metrics
 import logging
-from logging.handlers import RotatingFileHandler
-import sys
+import argparse
+import threading
+from log_utils import setup_logger
+from profiler import StageProfiler
+
+metrics = get_metrics()
+
+DEFAULT_QUERY = "증권가 빅뉴스 핫이슈"
+DEFAULT_CAPTION = "{year}년 {month:02d}월 {day:02d}일 {weekday} MQ 글로벌 증권가 뉴스"
+
+# 폰트/배경 이미지 캐시 (여러 카드와 에디션에서 공유)
+_font_cache = {}
+_background_cache = {}
+_asset_lock = threading.Lock()
+
+def load_font(font_path, size):
+    """폰트를 한 번만 로드하고 이후에는 캐시에서 반환"""
+    key = (font_path, size)
+    font = _font_cache.get(key)
+    if font is not None:
+        metrics.inc("cache_hits_total", cache="font")
+        return font
+    font = ImageFont.truetype(font_path, size)
+    with _asset_lock:
+        _font_cache[key] = font
+    return font
+
+def load_background(background_path):
+    """배경 이미지를 한 번만 디코딩하고, 카드마다 복사본을 반환"""
+    background = _background_cache.get(background_path)
+    if background is None:
+        with Image.open(background_path) as img:
+            img.load()
+            background = img.copy()
+        with _asset_lock:
+            _background_cache[background_path] = background
+    else:
+        metrics.inc("cache_hits_total", cache="background")
+    return background.copy()
 
 def get_text_width(text, font):
     """텍스트의 실제 픽셀 너비를 계산"""
@@ -54,7 +94,7 @@ def get_optimal_font_size(text, max_width, max_height, font_path, start_size=70)
     min_size = 40  # 최소 폰트 크기
     
     while font_size > min_size:
-        font = ImageFont.truetype(font_path, font_size)
+        font = load_font(font_path, font_size)
         lines = wrap_text(text, font, max_width)
         
         # 전체 텍스트 높이 계산
@@ -67,7 +107,7 @@ def get_optimal_font_size(text, max_width, max_height, font_path, start_size=70)
         font_size -= 5
     
     # 최소 폰트 크기로도 맞지 않으면 최소 크기 반환
-    font = ImageFont.truetype(font_path, min_size)
+    font = load_font(font_path, min_size)
     lines = wrap_text(text, font, max_width)
     total_height = len(lines) * (min_size + 10)
     return min_size, lines, total_height
@@ -77,7 +117,7 @@ def create_news_card_image(title, content, output_path):
     korean_font_path = os.path.join('fonts', 'NanumBarunGothicBold.ttf')
 
     try:
-        img = Image.open(background_path)
+        img = load_background(background_path)
     except FileNotFoundError:
         print("배경 이미지를 찾을 수 없습니다.")
         return
@@ -86,269 +126,332 @@ def create_news_card_image(title, content, output_path):
     width, height = img.size
     
     try:
-        title_font = ImageFont.truetype(korean_font_path, 70)
-        content_font = ImageFont.truetype(korean_font_path, 43)
-        source_font = ImageFont.truetype(korean_font_path, 20)
+        title_font = load_font(korean_font_path, 70)
+        content_font = load_font(korean_font_path, 43)
+        source_font = load_font(korean_font_path, 20)
     except:
         print("기본 폰트를 사용합니다.")
         title_font = ImageFont.load_default()
         content_font = ImageFont.load_default()
         source_font = ImageFont.load_default()
 
-    # 여백 설정
-    margin_x = 130
-    content_max_width = width - (margin_x * 2)
-    
-    # 제목 줄역 설정
-    title_max_width = width - (margin_x * 2)
-    title_max_height = 200  # 제목 영역 최대 높이
-    
-    # 최적의 제목 폰트 크기 찾기
-    title_font_size, title_lines, title_total_height = get_optimal_font_size(
-        title,
-        title_max_width,
-        title_max_height,
-        korean_font_path
-    )
+    with metrics.span("layout"):
+        # 여백 설정
+        margin_x = 130
+        content_max_width = width - (margin_x * 2)
     
-    title_font = ImageFont.truetype(korean_font_path, title_font_size)
+        # 제목 줄역 설정
+        title_max_width = width - (margin_x * 2)
+        title_max_height = 200  # 제목 영역 최대 높이
     
-    # 제목 시작 y좌표 (120으로 고정)
-    title_y = 120
+        # 최적의 제목 폰트 크기 찾기
+        with metrics.span("get_optimal_font_size"):
+            title_font_size, title_lines, title_total_height = get_optimal_font_size(
+                title,
+                title_max_width,
+                title_max_height,
+                korean_font_path
+            )
+    
+        title_font = load_font(korean_font_path, title_font_size)
+    
+        # 제목 시작 y좌표 (120으로 고정)
+        title_y = 120
     
-    # 내용 영역 시작 y좌표 동적 조정
-    content_y = max(360, title_y + title_total_height + 40)  # 최소 360px, 제목 아래 40px 여백
+        # 내용 영역 시작 y좌표 동적 조정
+        content_y = max(360, title_y + title_total_height + 40)  # 최소 360px, 제목 아래 40px 여백
     
-    # 내용 폰��� 및 줄바꿈 처리
-    content_font = ImageFont.truetype(korean_font_path, 43)
+        # 내용 폰��� 및 줄바꿈 처리
+        content_font = load_font(korean_font_path, 43)
     
-    # 내용 텍스트를 여러 줄로 나누기
-    content_lines = []
-    current_line = ""
+        # 내용 텍스트를 여러 줄로 나누기
+        content_lines = []
+        current_line = ""
     
-    # 단어 단위로 분리
-    words = content.split()
+        # 단어 단위로 분리
+        words = content.split()
     
-    for word in words:
-        # 현재 줄에 단어를 추가했을 때의 너비 계산
-        test_line = f"{current_line} {word}".strip()
-        test_bbox = draw.textbbox((0, 0), test_line, font=content_font)
-        test_width = test_bbox[2] - test_bbox[0]
+        for word in words:
+            # 현재 줄에 단어를 추가했을 때의 너비 계산
+            test_line = f"{current_line} {word}".strip()
+            test_bbox = draw.textbbox((0, 0), test_line, font=content_font)
+            test_width = test_bbox[2] - test_bbox[0]
         
-        # 최대 너비(여백 고려)를 초과하지 않으면 현재 줄에 단어 추가
-        if test_width <= width - (margin_x * 2):
-            current_line = test_line
-        else:
-            # 현재 줄이 비어있지 않으면 줄 추가
-            if current_line:
-                content_lines.append(current_line)
-            current_line = word
+            # 최대 너비(여백 고려)를 초과하지 않으면 현재 줄에 단어 추가
+            if test_width <= width - (margin_x * 2):
+                current_line = test_line
+            else:
+                # 현재 줄이 비어있지 않으면 줄 추가
+                if current_line:
+                    content_lines.append(current_line)
+                current_line = word
     
-    # 마지막 줄 추가
-    if current_line:
-        content_lines.append(current_line)
-    
-    # 줄 간격 설정
-    content_line_height = 60
-    
-    # 배경 박스의 패딩 설정
-    padding_x = 40
-    padding_y = 30
-    
-    # 내용 영역 배경 박스 그리기
-    content_box_left = margin_x - padding_x
-    content_box_top = content_y - padding_y
-    content_box_right = width - margin_x + padding_x
-    content_box_bottom = content_y + (len(content_lines) * content_line_height) + padding_y
-    
-    # 내용 영역 둥근 모서리 배경 박스 그리기
-    draw_rounded_rectangle(
-        draw,
-        [content_box_left, content_box_top, content_box_right, content_box_bottom],
-        radius=20,
-        fill=(31, 73, 165)
-    )
+        # 마지막 줄 추가
+        if current_line:
+            content_lines.append(current_line)
+    
+        # 줄 간격 설정
+        content_line_height = 60
+    
+        # 배경 박스의 패딩 설정
+        padding_x = 40
+        padding_y = 30
+    
+        # 내용 영역 배경 박스 그리기
+        content_box_left = margin_x - padding_x
+        content_box_top = content_y - padding_y
+        content_box_right = width - margin_x + padding_x
+        content_box_bottom = content_y + (len(content_lines) * content_line_height) + padding_y
+    
+    with metrics.span("draw"):
+        # 내용 영역 둥근 모서리 배경 박스 그리기
+        draw_rounded_rectangle(
+            draw,
+            [content_box_left, content_box_top, content_box_right, content_box_bottom],
+            radius=20,
+            fill=(31, 73, 165)
+        )
 
-    # 제목 그리기
-    current_title_y = title_y
-    for line in title_lines:
-        line_width = get_text_width(line, title_font)
-        title_x = (width - line_width) // 2
-        draw.text((title_x, current_title_y), line, font=title_font, fill='black')
-        current_title_y += title_font_size + 10
+        # 제목 그리기
+        current_title_y = title_y
+        for line in title_lines:
+            line_width = get_text_width(line, title_font)
+            title_x = (width - line_width) // 2
+            draw.text((title_x, current_title_y), line, font=title_font, fill='black')
+            current_title_y += title_font_size + 10
 
-    # 내용 그리기
-    current_y = content_y
-    for line in content_lines:
-        draw.text((margin_x, current_y), line, font=content_font, fill='white')
-        current_y += content_line_height
+        # 내용 그리기
+        current_y = content_y
+        for line in content_lines:
+            draw.text((margin_x, current_y), line, font=content_font, fill='white')
+            current_y += content_line_height
 
-    # 출처 텍스트 추가 (고정 위치)
-    source_text = "※ 출처 : MQ(Money Quotient)"
-    draw.text((600, 858), source_text, font=source_font, fill=(100, 100, 100))
+        # 출처 텍스트 추가 (고정 위치)
+        source_text = "※ 출처 : MQ(Money Quotient)"
+        draw.text((600, 858), source_text, font=source_font, fill=(100, 100, 100))
 
     # 이미지 저장
-    img.save(output_path)
-
-def setup_logger():
-    """로깅 설정"""
-    # 로그 폴더 생성
-    log_dir = "log"
-    os.makedirs(log_dir, exist_ok=True)
+    with metrics.span("encode"):
+        img.save(output_path)
     
-    # 오늘 날짜로 로그 파일명 생성
-    today = datetime.now().strftime('%Y%m%d')
-    log_file = os.path.join(log_dir, f'news_generator_{today}.log')
-    
-    # 로거 생성
-    logger = logging.getLogger('NewsGenerator')
-    logger.setLevel(logging.INFO)
-    
-    # 파일 핸들러 설정 (최대 10MB, 백업 5개)
-    file_handler = RotatingFileHandler(
-        log_file, 
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.INFO)
-    
-    # 콘솔 핸들러 설정
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    
-    # 포맷터 설정
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    # 핸들러 추가
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger
+    # 인코딩이 끝난 이미지 메모리 해제
+    img.close()
 
-def create_card_news(news_results):
+def create_card_news(news_results, image_server=None, store=None, analyzer=None):
     """뉴스 결과를 기반으로 카드 뉴스 이미지 생성"""
     generated_images = []
     logger = logging.getLogger('NewsGenerator')
+    store = store or OutputStore()
+    analyzer = analyzer or NewsAnalyzer()
     
     for idx, news in enumerate(news_results, 1):
         try:
-            logger.info(f"=== 뉴스 {idx} 처리 중 ===")
-            
-            # 뉴스 분석
-            analyzer = NewsAnalyzer()
-            analysis_result = analyzer.analyze_news(news['title'], news['content'])
-            
-            if not analysis_result:
-                logger.error(f"뉴스 {idx} 분석 실패")
-                continue
+            with metrics.span("article", index=idx):
+                logger.info("=== 뉴스 %s 처리 중 ===", idx)
                 
-            # 이미지 생성
-            today = datetime.now().strftime('%Y%m%d')
-            base_output_path = f"output/{today}_{idx}.png"
-            os.makedirs("output", exist_ok=True)
-            os.chmod("output", 0o777)  # 폴더 권한을 777로 설정
-            
-            output_path = base_output_path
-            counter = 1
-            while os.path.exists(output_path):
-                output_path = f"output/{today}_{idx}({counter}).png"
-                counter += 1
-            
-            create_news_card_image(
-                title=analysis_result['title'],
-                content=analysis_result['content'],
-                output_path=output_path
-            )
-            
-            # 생성된 이미지 경로 저장
-            generated_images.append(output_path)
-            logger.info(f"뉴스 카드 {idx} 생성 완료: {output_path}")
+                # 뉴스 분석
+                with metrics.span("analyze_news"):
+                    analysis_result = analyzer.analyze_news(news['title'], news['content'])
+                
+                if not analysis_result or 'error' in analysis_result:
+                    logger.error("뉴스 %s 분석 실패", idx)
+                    metrics.inc("failures_total", stage="analyze_news")
+                    continue
+                    
+                # 같은 내용의 카드가 이미 있으면 재사용 (다른 에디션이 렌더링 중이면 완료까지 대기)
+                card_hash = store.card_hash(analysis_result['title'], analysis_result['content'])
+                with store.reserve(card_hash) as existing:
+                    if existing is not None:
+                        output_path = existing['path']
+                        metrics.inc("cache_hits_total", cache="output_store")
+                        logger.info("뉴스 카드 %s 기존 이미지 재사용: %s", idx, output_path)
+                    else:
+                        # 이미지 생성 (임시 파일에 저장 후 원자적으로 교체)
+                        output_path = store.allocate(idx)
+                        with metrics.span("create_news_card_image"):
+                            with store.atomic_path(output_path) as tmp_path:
+                                create_news_card_image(
+                                    title=analysis_result['title'],
+                                    content=analysis_result['content'],
+                                    output_path=tmp_path
+                                )
+                        store.add(
+                            card_hash,
+                            output_path,
+                            title=analysis_result['title'],
+                            content=analysis_result['content'],
+                            source_url=news.get('source_url', '')
+                        )
+                
+                # 내장 이미지 서버를 사용하는 경우 렌더링 즉시 등록
+                if image_server is not None:
+                    image_server.register(output_path)
+                
+                # 생성된 이미지 경로 저장
+                generated_images.append(output_path)
+                logger.info("뉴스 카드 %s 생성 완료: %s", idx, output_path)
             
         except Exception as e:
-            logger.error(f"뉴스 {idx} 처리 중 오류 발생: {str(e)}")
+            logger.error("뉴스 %s 처리 중 오류 발생: %s", idx, e)
             continue
     
     return generated_images
 
-def main():
+def create_image_server():
+    """IMAGE_SERVER_PORT가 설정된 경우 내장 이미지 서버 생성"""
+    port = os.getenv("IMAGE_SERVER_PORT")
+    if not port:
+        return None
+    return ImageServer(
+        host=os.getenv("IMAGE_SERVER_HOST", "0.0.0.0"),
+        port=int(port),
+        public_url=os.getenv("DOMAIN_URL")
+    )
+
+def export_metrics():
+    """실행 지표(Prometheus 텍스트)와 JSON 트레이스를 METRICS_DIR에 저장"""
     logger = logging.getLogger('NewsGenerator')
     try:
-        # 뉴스 검색
-        logger.info("=== 뉴스 검색 시작 ===")
-        fetcher = NewsFetcher()
-        news_results = fetcher.get_formatted_news("증권가 빅뉴스 핫이슈", 5)
-        
-        if not news_results:
-            logger.error("뉴스를 찾을 수 없습니다.")
-            return
-            
-        logger.info(f"총 {len(news_results)}개의 뉴스를 찾았습니다.")
-        logger.info("=== 검색된 뉴스 목록 ===")
-        for idx, news in enumerate(news_results, 1):
-            logger.info(f"\n[뉴스 {idx}]")
-            logger.info(f"제목: {news['title']}")
-            logger.info(f"URL: {news['source_url']}")
-        
-        # 중복 URL 제거
-        unique_news = []
-        seen_urls = set()
-        
-        logger.info("=== 중복 제거 처리 ===")
-        for news in news_results:
-            if news['source_url'] not in seen_urls:
-                unique_news.append(news)
-                seen_urls.add(news['source_url'])
-            else:
-                logger.info(f"중복 제거된 뉴스: {news['title']} ({news['source_url']})")
-        
-        logger.info(f"중복 제거 후 {len(unique_news)}개의 뉴스가 남았습니다.")
-        
-        # 카드 뉴스 이미지 생성
-        logger.info("=== 이미지 생성 시작 ===")
-        generated_images = create_card_news(unique_news)
-        
-        if not generated_images:
-            logger.warning("생성된 이미지가 없습니다.")
-            return
-        
-        logger.info(f"총 {len(generated_images)}개의 카드 뉴스가 생성되었습니다.")
-        
-        # Instagram 업로드
-        logger.info("Instagram에 업로드를 시작합니다...")
-        
-        # 도메인 URL 가져오기
-        domain_url = os.getenv("DOMAIN_URL")
-        if not domain_url:
-            raise ValueError("DOMAIN_URL이 설정되지 않았습니다. .env 파일을 확인해주세요.")
+        metrics.export(os.getenv("METRICS_DIR", "metrics"))
+    except OSError as e:
+        logger.error("지표 저장 실패: %s", e)
+
+def build_caption(template=DEFAULT_CAPTION, now=None):
+    """날짜/요일을 채운 게시물 캡션 생성"""
+    weekdays = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+    now = now or datetime.now()
+    return template.format(
+        year=now.year,
+        month=now.month,
+        day=now.day,
+        weekday=weekdays[now.weekday()]
+    )
+
+def run_edition(query=DEFAULT_QUERY, max_results=5, caption_template=DEFAULT_CAPTION, store=None,
+                image_server=None, fetcher=None, analyzer=None, instagram=None):
+    """뉴스 검색부터 Instagram 업로드까지 에디션 하나를 실행하고 업로드 결과를 반환"""
+    logger = logging.getLogger('NewsGenerator')
+    
+    # 뉴스 검색
+    logger.info("=== 뉴스 검색 시작 ===")
+    fetcher = fetcher or NewsFetcher()
+    with metrics.span("fetch_news"):
+        news_results = fetcher.get_formatted_news(query, max_results)
+    
+    if not news_results:
+        logger.error("뉴스를 찾을 수 없습니다.")
+        return {"success": False, "error": "뉴스를 찾을 수 없습니다."}
         
-        # 이미지 URL 리스트 생성
+    logger.info("총 %s개의 뉴스를 찾았습니다.", len(news_results))
+    logger.info("=== 검색된 뉴스 목록 ===")
+    for idx, news in enumerate(news_results, 1):
+        logger.info("\n[뉴스 %s]", idx)
+        logger.info("제목: %s", news['title'])
+        logger.info("URL: %s", news['source_url'])
+    
+    # 중복 URL 제거
+    unique_news = []
+    seen_urls = set()
+    
+    logger.info("=== 중복 제거 처리 ===")
+    for news in news_results:
+        if news['source_url'] not in seen_urls:
+            unique_news.append(news)
+            seen_urls.add(news['source_url'])
+        else:
+            logger.info("중복 제거된 뉴스: %s (%s)", news['title'], news['source_url'])
+    
+    logger.info("중복 제거 후 %s개의 뉴스가 남았습니다.", len(unique_news))
+    
+    # 카드 뉴스 이미지 생성
+    logger.info("=== 이미지 생성 시작 ===")
+    generated_images = create_card_news(unique_news, image_server, store, analyzer)
+    
+    if not generated_images:
+        logger.warning("생성된 이미지가 없습니다.")
+        return {"success": False, "error": "생성된 이미지가 없습니다."}
+    
+    logger.info("총 %s개의 카드 뉴스가 생성되었습니다.", len(generated_images))
+    
+    # Instagram 업로드
+    logger.info("Instagram에 업로드를 시작합니다...")
+    
+    # 도메인 URL 가져오기
+    domain_url = os.getenv("DOMAIN_URL")
+    if not domain_url:
+        raise ValueError("DOMAIN_URL이 설정되지 않았습니다. .env 파일을 확인해주세요.")
+    
+    # 이미지 URL 리스트 생성
+    if image_server is not None:
+        image_urls = [image_server.url_for(path) for path in generated_images]
+    else:
         image_urls = [f"{domain_url}/card-news-generator/{path}" for path in generated_images]
 
-        # 캡션 생성
-        weekdays = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
-        now = datetime.now()
-        weekday = weekdays[now.weekday()]
-        caption = f"{now.year}년 {now.month:02d}월 {now.day:02d}일 {weekday} MQ 글로벌 증권가 뉴스"
-        
-        # Instagram API 초기화 및 업로드
-        instagram = InstagramAPI()
+    # 캡션 생성
+    caption = build_caption(caption_template)
+    
+    # Instagram API 초기화 및 업로드
+    instagram = instagram or InstagramAPI(image_server=image_server)
+    with metrics.span("upload", images=len(image_urls)):
         result = instagram.post_image(image_urls, caption)
+    
+    if result["success"]:
+        metrics.inc("posts_total", status="success")
+        logger.info("Instagram 업로드 성공! 게시물 ID: %s", result['post_id'])
+        logger.info(result["status"])
+        logger.info("\n모든 처리가 완료되었습니다!")
+    else:
+        metrics.inc("posts_total", status="failure")
+        logger.error("Instagram 업로드 실패: %s", result['error'])
+        logger.warning("\n이미지 생성은 완료되었으나 Instagram 업로드에 실패했습니다.")
+    
+    return result
+
+def main():
+    logger = logging.getLogger('NewsGenerator')
+    image_server = None
+    try:
+        image_server = create_image_server()
         
-        if result["success"]:
-            logger.info(f"Instagram 업로드 성공! 게시물 ID: {result['post_id']}")
-            logger.info(result["status"])
-            logger.info("\n모든 처리가 완료되었습니다!")
-        else:
-            logger.error(f"Instagram 업로드 실패: {result['error']}")
-            logger.warning("\n이미지 생성은 완료되었으나 Instagram 업로드에 실패했습니다.")
+        # 출력 저장소 준비 (보관 기간이 설정된 경우 오래된 카드 정리)
+        store = OutputStore()
+        retention_days = os.getenv("OUTPUT_RETENTION_DAYS")
+        if retention_days:
+            store.gc(int(retention_days))
+        
+        if image_server is not None:
+            image_server.start()
+        
+        run_edition(store=store, image_server=image_server)
         
     except Exception as e:
-        logger.error(f"처리 중 오류 발생: {str(e)}")
+        logger.error("처리 중 오류 발생: %s", e)
+    finally:
+        if image_server is not None:
+            image_server.stop()
+        export_metrics()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="카드 뉴스 생성 및 Instagram 업로드")
+    parser.add_argument("--profile", action="store_true",
+                        help="단계별(fetch, analyze, layout, draw, encode, upload) cProfile/tracemalloc 리포트 생성")
+    parser.add_argument("--profile-dir", default="profile", help="프로파일링 결과 저장 폴더 (기본값: profile)")
+    args = parser.parse_args()
+    
     # 로거 설정
     logger = setup_logger()
-    main()
+    
+    # 로컬 지표 엔드포인트 (선택)
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        metrics.serve(int(metrics_port))
+    
+    profiler = StageProfiler(args.profile_dir) if args.profile else None
+    if profiler is not None:
+        profiler.start()
+    try:
+        main()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            profiler.write_reports()
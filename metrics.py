@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 단계별 소요 시간 히스토그램 버킷 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# 주요 지표 설명 (Prometheus HELP)
+HELP_TEXTS = {
+    "stage_duration_seconds": "파이프라인 단계별 소요 시간",
+    "failures_total": "단계별 실패 횟수",
+    "retries_total": "재시도 횟수",
+    "cache_hits_total": "캐시 적중 횟수",
+    "llm_tokens_total": "LLM 토큰 사용량 (추정치 포함)",
+    "posts_total": "Instagram 게시 결과",
+    "rate_limit_wait_seconds": "API 호출 제한으로 대기한 시간",
+    "editions_total": "에디션 실행 결과",
+    "editions_late_total": "마감 시각을 넘겨 완료된 에디션 수",
+    "bulk_cards_total": "일괄 렌더링 결과",
+    "bulk_card_seconds": "일괄 렌더링 카드별 소요 시간",
+    "llm_prompt_tokens": "LLM 호출별 프롬프트 토큰 수 (추정치)",
+    "llm_input_tokens_saved_total": "본문 전처리로 줄인 입력 토큰 수 (추정치)",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    items = list(label_key) + list(extra)
+    if not items:
+        return ""
+    escaped = []
+    for key, value in items:
+        value = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self, namespace="card_news", max_spans=50000):
+        """파이프라인 단계별 지표(카운터, 히스토그램)와 실행 트레이스 수집기
+
+        트레이스는 최대 max_spans 개까지만 보관하고, 이후 span 은 지표에만 반영한다.
+        """
+        self.logger = logging.getLogger('NewsGenerator')
+        self.namespace = namespace
+        self.max_spans = max_spans
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._server = None
+        self._span_listeners = []
+        self.reset()
+
+    def reset(self):
+        """새 실행(run)을 시작 - 누적 지표와 트레이스를 초기화"""
+        with self._lock:
+            self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            self._run_started = time.time()
+            self._counters = {}
+            self._histograms = {}
+            self._help = {}
+            self._spans = []
+            self._dropped_spans = 0
+
+    def _name(self, name):
+        return f"{self.namespace}_{name}"
+
+    def inc(self, name, value=1, help_text=None, **labels):
+        """카운터 증가 (예: inc("retries_total", operation="image_url_probe"))"""
+        metric = self._name(name)
+        help_text = help_text or HELP_TEXTS.get(name)
+        with self._lock:
+            if help_text:
+                self._help[metric] = help_text
+            series = self._counters.setdefault(metric, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, help_text=None, **labels):
+        """히스토그램에 값 기록"""
+        metric = self._name(name)
+        help_text = help_text or HELP_TEXTS.get(name)
+        with self._lock:
+            if help_text:
+                self._help[metric] = help_text
+            series = self._histograms.setdefault(metric, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = _Histogram(buckets)
+            series[key].observe(value)
+
+    def record_tokens(self, model, prompt_tokens=0, completion_tokens=0):
+        """LLM 토큰 사용량 기록"""
+        if prompt_tokens:
+            self.inc("llm_tokens_total", prompt_tokens, model=model, type="prompt")
+        if completion_tokens:
+            self.inc("llm_tokens_total", completion_tokens, model=model, type="completion")
+
+    def add_span_listener(self, listener):
+        """span 시작/종료 시점을 통지받을 리스너 등록 (span_started(name), span_finished(name))"""
+        self._span_listeners.append(listener)
+
+    def remove_span_listener(self, listener):
+        if listener in self._span_listeners:
+            self._span_listeners.remove(listener)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """단계 실행 구간을 측정 - 소요 시간 히스토그램과 트레이스에 기록
+
+        with 블록 안에서 yield 된 dict 에 값을 넣으면 트레이스 속성으로 함께 저장된다.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        span = {
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": stack[-1]["span_id"] if stack else None,
+            "name": name,
+            "thread": threading.current_thread().name,
+            "start": time.time() - self._run_started,
+            "attrs": dict(attrs),
+            "status": "ok",
+        }
+        stack.append(span)
+        for listener in self._span_listeners:
+            listener.span_started(name)
+        started = time.perf_counter()
+        try:
+            yield span["attrs"]
+        except BaseException as e:
+            span["status"] = "error"
+            span["error"] = str(e)
+            self.inc("failures_total", stage=name)
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            for listener in reversed(self._span_listeners):
+                listener.span_finished(name)
+            stack.pop()
+            span["duration"] = duration
+            self.observe("stage_duration_seconds", duration, stage=name)
+            with self._lock:
+                if len(self._spans) < self.max_spans:
+                    self._spans.append(span)
+                else:
+                    self._dropped_spans += 1
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 포맷으로 변환"""
+        lines = []
+        with self._lock:
+            for metric, series in sorted(self._counters.items()):
+                if metric in self._help:
+                    lines.append(f"# HELP {metric} {self._help[metric]}")
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(key)} {_format_value(value)}")
+
+            for metric, series in sorted(self._histograms.items()):
+                if metric in self._help:
+                    lines.append(f"# HELP {metric} {self._help[metric]}")
+                lines.append(f"# TYPE {metric} histogram")
+                for key, hist in sorted(series.items()):
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        le = (("le", _format_value(float(bound))),)
+                        lines.append(f"{metric}_bucket{_format_labels(key, le)} {count}")
+                    lines.append(f'{metric}_bucket{_format_labels(key, (("le", "+Inf"),))} {hist.count}')
+                    lines.append(f"{metric}_sum{_format_labels(key)} {_format_value(hist.total)}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_trace(self):
+        """실행 단위 JSON 트레이스"""
+        with self._lock:
+            spans = sorted(self._spans, key=lambda span: span["start"])
+            return {
+                "run_id": self.run_id,
+                "started_at": datetime.fromtimestamp(self._run_started).isoformat(),
+                "duration": time.time() - self._run_started,
+                "dropped_spans": self._dropped_spans,
+                "spans": spans,
+            }
+
+    def write_prometheus(self, path):
+        """Prometheus 텍스트 파일 저장 (node_exporter textfile collector 호환)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def write_trace(self, directory):
+        """실행 트레이스를 trace_{run_id}.json 으로 저장"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"trace_{self.run_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_trace(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def export(self, directory="metrics"):
+        """지표 파일(metrics.prom)과 실행 트레이스 파일을 함께 저장"""
+        prom_path = self.write_prometheus(os.path.join(directory, "metrics.prom"))
+        trace_path = self.write_trace(directory)
+        self.logger.info("지표 저장 완료: %s, %s", prom_path, trace_path)
+        return prom_path, trace_path
+
+    def serve(self, port, host="127.0.0.1"):
+        """로컬 /metrics 엔드포인트 시작"""
+        if self._server is not None:
+            return
+        metrics = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True).start()
+        self.logger.info("지표 엔드포인트 시작: http://%s:%s/metrics", host, self._server.server_port)
+
+    def stop_serving(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """프로세스 공용 Metrics 인스턴스"""
+    return _metrics
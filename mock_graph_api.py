@@ -0,0 +1,144 @@
+import json
+import time
+import threading
+import logging
+from itertools import count
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from instagram_post import InstagramAPI
+
+
+class _MockGraphHandler(BaseHTTPRequestHandler):
+    server_version = "MockGraphAPI"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_HEAD(self):
+        # 이미지 URL 접근성 확인용
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        mock = self.server.mock
+        path = urlparse(self.path).path
+        if path.endswith("/media_publish"):
+            self._send_json(200, {"id": "post_1"})
+        elif path.endswith("/media"):
+            time.sleep(mock.create_delay)
+            self._send_json(200, {"id": mock.create_container()})
+        else:
+            self._send_json(404, {"error": {"message": "Unknown path"}})
+
+    def do_GET(self):
+        mock = self.server.mock
+        parsed = urlparse(self.path)
+        container_id = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+        if parse_qs(parsed.query).get("fields") != ["status_code"]:
+            self._send_json(400, {"error": {"message": "Unsupported fields"}})
+            return
+        if mock.status_http_error:
+            status, message = mock.status_http_error
+            self._send_json(status, {"error": {"message": message}})
+            return
+        self._send_json(200, {"status_code": mock.next_status(container_id)})
+
+
+class MockGraphAPI:
+    def __init__(self, statuses=("IN_PROGRESS", "FINISHED"), status_http_error=None, create_delay=0):
+        """컨테이너 상태 전이(IN_PROGRESS → FINISHED/ERROR)를 재현하는 로컬 Graph API
+
+        컨테이너마다 statuses 를 순서대로 돌려주고, 마지막 상태는 계속 유지한다.
+        status_http_error=(401, "메시지") 이면 상태 조회를 해당 HTTP 오류로 응답한다.
+        create_delay 는 컨테이너 생성 요청마다 지연시킬 시간(초)이다.
+        """
+        self.statuses = list(statuses)
+        self.status_http_error = status_http_error
+        self.create_delay = create_delay
+        self._ids = count(1)
+        self._polls = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _MockGraphHandler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def create_container(self):
+        with self._lock:
+            container_id = f"container_{next(self._ids)}"
+            self._polls[container_id] = 0
+        return container_id
+
+    def next_status(self, container_id):
+        with self._lock:
+            polls = self._polls.get(container_id, 0)
+            self._polls[container_id] = polls + 1
+        return self.statuses[min(polls, len(self.statuses) - 1)]
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, name="MockGraphAPI", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def run_checks():
+    """컨테이너 상태 전이별로 post_image 동작을 확인하고, 모든 확인이 통과하면 True 반환"""
+    scenarios = [
+        # (설명, 상태 순서, 상태 조회 HTTP 오류, 상태 확인 제한 시간, 컨테이너 생성 지연, 기대 결과)
+        ("IN_PROGRESS → FINISHED", ("IN_PROGRESS", "IN_PROGRESS", "FINISHED"), None, 10, 0, True),
+        ("IN_PROGRESS → ERROR", ("IN_PROGRESS", "ERROR"), None, 10, 0, False),
+        ("IN_PROGRESS 유지 (제한 시간 초과)", ("IN_PROGRESS",), None, 1, 0, False),
+        ("상태 조회 401 (즉시 실패)", ("FINISHED",), (401, "Invalid OAuth access token"), 10, 0, False),
+        # 생성 시간 합계(2.4초)가 상태 확인 제한 시간(2초)보다 길어도 상태 확인은 성공해야 함
+        ("컨테이너 생성 지연 (제한 시간에서 제외)", ("IN_PROGRESS", "FINISHED"), None, 2, 0.8, True),
+    ]
+    image_urls = {
+        "단일 이미지": "/card_1.png",
+        "캐러셀": ["/card_1.png", "/card_2.png", "/card_3.png"],
+    }
+
+    passed = True
+    for description, statuses, http_error, timeout, create_delay, expected in scenarios:
+        for kind, paths in image_urls.items():
+            with MockGraphAPI(statuses, http_error, create_delay) as mock:
+                api = InstagramAPI(
+                    base_url=mock.url,
+                    status_timeout=timeout,
+                    status_initial_delay=0.1,
+                    status_max_delay=0.4,
+                    access_token="test-token",
+                    account_id="test-account"
+                )
+                if isinstance(paths, list):
+                    images = [mock.url + path for path in paths]
+                else:
+                    images = mock.url + paths
+                result = api.post_image(images, caption="mock")
+
+            ok = result["success"] == expected
+            passed = passed and ok
+            detail = result.get("post_id") or result.get("error")
+            print(f"[{'OK' if ok else 'FAIL'}] {description} / {kind}: {detail}")
+    return passed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    raise SystemExit(0 if run_checks() else 1)
@@ -5,15 +5,37 @@ from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
 import os
 import json
+import hashlib
+import threading
 import logging
+from metrics import get_metrics
+import rate_limit
+from content_trimmer import estimate_tokens, trim_content
 
 # Load environment variables
 load_dotenv()
 
+# 뉴스 본문에 허용하는 입력 토큰 예산 (기본값, LLM_INPUT_TOKEN_BUDGET 로 변경 가능)
+DEFAULT_INPUT_TOKEN_BUDGET = 600
+
+# 프롬프트 토큰 수 분포 히스토그램 버킷
+PROMPT_TOKEN_BUCKETS = (250, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+
 class NewsAnalyzer:
-    def __init__(self):
+    def __init__(self, input_token_budget=None):
         """Initialize the NewsAnalyzer with Gemini Pro model"""
         self.logger = logging.getLogger('NewsGenerator')
+        self.metrics = get_metrics()
+        self.model_name = "gemini-1.5-flash"
+        
+        # 본문 입력 토큰 예산 (0 이면 상투 문구/중복 제거만 하고 문장은 자르지 않음)
+        if input_token_budget is None:
+            input_token_budget = int(os.getenv("LLM_INPUT_TOKEN_BUDGET", DEFAULT_INPUT_TOKEN_BUDGET))
+        self.input_token_budget = input_token_budget
+        
+        # 같은 기사를 여러 에디션에서 분석하지 않도록 결과 캐시 (제목 + 본문 해시 기준)
+        self._cache = {}
+        self._cache_lock = threading.Lock()
         
         # API 키 확인
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -22,7 +44,7 @@ class NewsAnalyzer:
             raise ValueError("환경 변수 GOOGLE_API_KEY가 설정되지 않았습니다.")
 
         self.llm = GoogleGenerativeAI(
-            model="gemini-1.5-flash",
+            model=self.model_name,
             google_api_key=api_key,
             temperature=0.8
         )
@@ -68,14 +90,43 @@ class NewsAnalyzer:
         )
     
     def analyze_news(self, title, content):
+        cache_key = hashlib.sha256(f"{title}\n{content}".encode("utf-8")).hexdigest()
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+        if cached is not None:
+            self.metrics.inc("cache_hits_total", cache="analysis")
+            self.logger.info("뉴스 분석 캐시 사용 - 제목: %s...", title[:30])
+            return dict(cached)
+        
         try:
-            self.logger.info(f"뉴스 분석 시작 - 제목: {title[:30]}...")
+            self.logger.info("뉴스 분석 시작 - 제목: %s...", title[:30])
             
-            # LLM 체인 실행
-            response_text = self.chain.invoke({
+            # 본문 전처리 (상투 문구/중복 제거, 토큰 예산에 맞게 중요 문장 추출)
+            trimmed_content, content_tokens, trimmed_tokens = trim_content(title, content, self.input_token_budget)
+            if trimmed_tokens < content_tokens:
+                self.logger.info("본문 전처리: %s → %s 토큰", content_tokens, trimmed_tokens)
+                self.metrics.inc("llm_input_tokens_saved_total", content_tokens - trimmed_tokens, model=self.model_name)
+            
+            inputs = {
                 "news_title": title,
-                "news_content": content
-            })
+                "news_content": trimmed_content
+            }
+            prompt_tokens = estimate_tokens(self.prompt.format(**inputs))
+            self.metrics.observe("llm_prompt_tokens", prompt_tokens, buckets=PROMPT_TOKEN_BUCKETS, model=self.model_name)
+            
+            # LLM 체인 실행
+            with rate_limit.limit("gemini"), self.metrics.span("llm.invoke", model=self.model_name) as span:
+                response_text = self.chain.invoke(inputs)
+                completion_tokens = estimate_tokens(response_text)
+                # 여러 에디션 스레드가 analyzer 를 공유하므로 사용량은 인스턴스가 아닌 결과와 함께 반환
+                usage = {
+                    "content_tokens": content_tokens,
+                    "trimmed_content_tokens": trimmed_tokens,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens
+                }
+                span.update(usage)
+            self.metrics.record_tokens(self.model_name, prompt_tokens, completion_tokens)
             
             # Clean the response text and ensure it's valid JSON
             response_text = response_text.strip()
@@ -87,23 +138,27 @@ class NewsAnalyzer:
             try:
                 parsed_result = json.loads(response_text)
             except json.JSONDecodeError as e:
-                self.logger.error(f"JSON 파싱 오류: {e}")
-                self.logger.error(f"응답 텍스트: {response_text}")
+                self.logger.error("JSON 파싱 오류: %s", e)
+                self.logger.error("응답 텍스트: %s", response_text)
                 return {"error": "JSON 파싱 오류"}
             
             # Ensure all required fields are present
             required_fields = ['title', 'content']
             for field in required_fields:
                 if field not in parsed_result:
-                    self.logger.error(f"필수 필드 누락: {field}")
-                    self.logger.error(f"파싱된 결과: {parsed_result}")
+                    self.logger.error("필수 필드 누락: %s", field)
+                    self.logger.error("파싱된 결과: %s", parsed_result)
                     return {"error": f"필수 필드 누락: {field}"}
             
+            with self._cache_lock:
+                self._cache[cache_key] = dict(parsed_result)
+            
             self.logger.info("뉴스 분석 완료")
-            return parsed_result
+            # 캐시 결과에는 LLM 호출이 없으므로 usage 를 넣지 않음
+            return {**parsed_result, "usage": usage}
             
         except Exception as e:
-            self.logger.error(f"분석 중 오류 발생: {str(e)}")
+            self.logger.error("분석 중 오류 발생: %s", e)
             return {"error": f"분석 중 오류 발생: {str(e)}"}
 
 # Usage example
@@ -4,6 +4,8 @@ from tavily import TavilyClient
 from datetime import datetime, timedelta
 import requests
 import logging
+from metrics import get_metrics
+import rate_limit
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
@@ -11,6 +13,7 @@ load_dotenv()
 class NewsFetcher:
     def __init__(self):
         self.logger = logging.getLogger('NewsGenerator')
+        self.metrics = get_metrics()
         self.api_key = os.getenv('TAVILY_API_KEY')
         if not self.api_key:
             self.logger.error("TAVILY_API_KEY가 .env 파일에 설정되지 않았습니다.")
@@ -20,18 +23,20 @@ class NewsFetcher:
     def fetch_news(self, query, max_results=5):
         """주어진 쿼리로 뉴스를 검색합니다."""
         try:
-            self.logger.info(f"뉴스 검색 시작: {query}")
+            self.logger.info("뉴스 검색 시작: %s", query)
             
             # Tavily API 호출
-            response = self.client.search(
-                query=f"{query}",
-                topic="news",
-                days=1,
-                search_depth="advanced",
-                include_images=False,
-                include_raw_content=False,
-                max_results=max_results
-            )
+            with rate_limit.limit("tavily"), self.metrics.span("tavily.search") as span:
+                response = self.client.search(
+                    query=f"{query}",
+                    topic="news",
+                    days=1,
+                    search_depth="advanced",
+                    include_images=False,
+                    include_raw_content=False,
+                    max_results=max_results
+                )
+                span['results'] = len(response.get('results', []))
 
             # 결과 처리
             news_articles = []
@@ -44,16 +49,17 @@ class NewsFetcher:
                 }
                 news_articles.append(article)
 
-            self.logger.info(f"검색된 뉴스 개수: {len(news_articles)}")
+            self.logger.info("검색된 뉴스 개수: %s", len(news_articles))
             return news_articles
 
         except Exception as e:
-            self.logger.error(f"뉴스 검색 중 오류 발생: {str(e)}")
+            self.metrics.inc("failures_total", stage="fetch_news")
+            self.logger.error("뉴스 검색 중 오류 발생: %s", e)
             return []
 
     def get_formatted_news(self, query, max_results=5):
         """뉴스를 검색하고 포맷팅된 결과를 반환합니다."""
-        self.logger.info(f"포맷팅된 뉴스 검색 시작: {query}")
+        self.logger.info("포맷팅된 뉴스 검색 시작: %s", query)
         news_list = self.fetch_news(query, max_results)
         if not news_list:
             self.logger.warning("검색된 뉴스가 없습니다.")
@@ -67,7 +73,7 @@ class NewsFetcher:
                 'source_url': news.get('url', '')
             })
         
-        self.logger.info(f"포맷팅된 뉴스 개수: {len(formatted_news)}")
+        self.logger.info("포맷팅된 뉴스 개수: %s", len(formatted_news))
         return formatted_news
 
 def main():
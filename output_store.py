@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+MANIFEST_NAME = "manifest.jsonl"
+
+# 날짜 샤드 디렉터리 이름 (YYYYMMDD)
+_SHARD_PATTERN = re.compile(r"^\d{8}$")
+# 카드 파일 이름: YYYYMMDD_N.png 또는 YYYYMMDD_N(K).png
+_NAME_PATTERN = re.compile(r"^(\d{8})_(\d+)(?:\((\d+)\))?\.png$")
+
+
+@contextmanager
+def atomic_path(path):
+    """임시 파일 경로를 넘겨주고, 블록이 성공하면 최종 경로로 원자적으로 교체"""
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=os.path.splitext(name)[1], dir=directory or ".")
+    os.close(fd)
+    try:
+        yield tmp_path
+        if os.path.getsize(tmp_path) == 0:
+            raise OSError(f"생성된 파일이 비어 있습니다: {path}")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class OutputStore:
+    def __init__(self, root="output"):
+        """날짜별 샤드 디렉터리와 manifest 인덱스로 관리하는 카드 이미지 저장소"""
+        self.logger = logging.getLogger('NewsGenerator')
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        # 렌더링 중인 카드 해시 (여러 에디션 스레드가 같은 카드를 중복 생성하지 않도록)
+        self._reserved = set()
+        self._reserved_changed = threading.Condition(self._lock)
+        self._records = {}   # card_hash -> record
+        self._counters = {}  # (date, idx) -> 다음 중복 번호
+        self._shards = set()  # 이번 실행에서 준비(생성/스캔)된 샤드
+
+        os.makedirs(root, exist_ok=True)
+        os.chmod(root, 0o777)  # 폴더 권한을 777로 설정
+        self._load_manifest()
+
+    @staticmethod
+    def card_hash(title, content):
+        """카드 내용(제목 + 본문) 해시"""
+        return hashlib.sha256(f"{title}\n{content}".encode("utf-8")).hexdigest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 비정상 종료로 마지막 줄이 잘린 경우 무시
+                    self.logger.warning("manifest 손상 라인 무시: %s", line)
+                    continue
+                self._records[record["hash"]] = record
+        self.logger.info("manifest 로드 완료: %s개 항목", len(self._records))
+
+    def _prepare_shard(self, date):
+        """샤드 디렉터리를 준비하고 기존 파일 이름으로 중복 번호를 초기화 (샤드당 1회)"""
+        shard_dir = os.path.join(self.root, date)
+        if date in self._shards:
+            return shard_dir
+
+        os.makedirs(shard_dir, exist_ok=True)
+        os.chmod(shard_dir, 0o777)  # 폴더 권한을 777로 설정
+
+        for name in os.listdir(shard_dir):
+            match = _NAME_PATTERN.match(name)
+            if not match:
+                continue
+            key = (match.group(1), int(match.group(2)))
+            counter = int(match.group(3) or 0) + 1
+            self._counters[key] = max(self._counters.get(key, 0), counter)
+
+        self._shards.add(date)
+        return shard_dir
+
+    def allocate(self, idx, date=None):
+        """새 카드 이미지 경로를 할당 (디렉터리 탐색 없이 O(1))"""
+        date = date or datetime.now().strftime('%Y%m%d')
+        with self._lock:
+            shard_dir = self._prepare_shard(date)
+            key = (date, idx)
+            counter = self._counters.get(key, 0)
+            self._counters[key] = counter + 1
+
+        name = f"{date}_{idx}.png" if counter == 0 else f"{date}_{idx}({counter}).png"
+        return os.path.join(shard_dir, name)
+
+    def atomic_path(self, path):
+        """임시 파일 경로를 넘겨주고, 블록이 성공하면 최종 경로로 원자적으로 교체"""
+        return atomic_path(path)
+
+    def get(self, card_hash):
+        """해시로 기존 카드 조회 (파일이 남아 있는 경우만)"""
+        with self._lock:
+            record = self._records.get(card_hash)
+        if record and os.path.exists(record["path"]):
+            return record
+        return None
+
+    def get_or_reserve(self, card_hash):
+        """기존 카드를 반환하고, 없으면 이 호출자가 렌더링하도록 예약 후 None 반환
+
+        다른 스레드가 같은 카드를 렌더링 중이면 add() 또는 release() 될 때까지 기다린다.
+        None 을 받은 호출자는 add() 또는 release() 로 예약을 풀어야 한다.
+        """
+        with self._reserved_changed:
+            while card_hash in self._reserved:
+                self._reserved_changed.wait()
+            record = self._records.get(card_hash)
+            if record and os.path.exists(record["path"]):
+                return record
+            self._reserved.add(card_hash)
+            return None
+
+    def release(self, card_hash):
+        """렌더링 예약 해제 (실패 시) - 기다리던 스레드가 다시 조회"""
+        with self._reserved_changed:
+            self._reserved.discard(card_hash)
+            self._reserved_changed.notify_all()
+
+    @contextmanager
+    def reserve(self, card_hash):
+        """get_or_reserve() 결과를 넘겨주고, 블록이 끝나면 남은 예약을 해제"""
+        record = self.get_or_reserve(card_hash)
+        try:
+            yield record
+        finally:
+            if record is None:
+                self.release(card_hash)
+
+    def add(self, card_hash, path, **metadata):
+        """카드를 manifest 에 기록"""
+        record = {
+            "hash": card_hash,
+            "path": path,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            **metadata,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._records[card_hash] = record
+            self._reserved.discard(card_hash)
+            self._reserved_changed.notify_all()
+        return record
+
+    def records(self):
+        """manifest 항목 목록"""
+        with self._lock:
+            return list(self._records.values())
+
+    def _write_manifest(self):
+        directory = os.path.dirname(self.manifest_path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{MANIFEST_NAME}.", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for record in self._records.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.manifest_path)
+
+    def gc(self, retention_days, now=None):
+        """보관 기간이 지난 날짜 샤드를 삭제하고 manifest 를 정리 (삭제된 샤드 목록 반환)"""
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=retention_days)).strftime('%Y%m%d')
+        removed = []
+
+        with self._lock:
+            for name in sorted(os.listdir(self.root)):
+                shard_dir = os.path.join(self.root, name)
+                if _SHARD_PATTERN.match(name) and name < cutoff and os.path.isdir(shard_dir):
+                    shutil.rmtree(shard_dir)
+                    self._shards.discard(name)
+                    removed.append(name)
+
+            stale = [card_hash for card_hash, record in self._records.items()
+                     if not os.path.exists(record["path"])]
+            for card_hash in stale:
+                del self._records[card_hash]
+            if removed or stale:
+                self._write_manifest()
+
+        if removed or stale:
+            self.logger.info("보관 기간(%s일) 정리: 샤드 %s개, manifest 항목 %s개 삭제",
+                             retention_days, len(removed), len(stale))
+        return removed
@@ -0,0 +1,218 @@
+import os
+import io
+import cProfile
+import pstats
+import threading
+import tracemalloc
+import logging
+from datetime import datetime
+
+from metrics import get_metrics
+
+# metrics span 이름 → 프로파일링 단계
+STAGE_MAP = {
+    "fetch_news": "fetch",
+    "analyze_news": "analyze",
+    "layout": "layout",
+    "get_optimal_font_size": "layout",
+    "draw": "draw",
+    "encode": "encode",
+    "upload": "upload",
+}
+
+# 스택 깊이 제한 (collapsed stack 생성 시)
+MAX_STACK_DEPTH = 64
+
+
+def _frame_label(func):
+    filename, line, name = func
+    if filename == "~":
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(";", ":")
+
+
+def collapsed_stacks(stats, root=None):
+    """pstats 호출 그래프를 flamegraph 도구용 collapsed stack 라인으로 변환
+
+    cProfile 은 호출자-피호출자 관계만 기록하므로, 피호출 함수의 시간을 호출 경로별
+    누적 시간 비율로 나누어 근사한 스택을 만든다. 값은 마이크로초 단위.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+
+    lines = {}
+
+    def walk(func, path, scale):
+        tt = raw[func][2]
+        path = path + [_frame_label(func)]
+        self_time = int(tt * scale * 1e6)
+        if self_time > 0:
+            key = ";".join(path)
+            lines[key] = lines.get(key, 0) + self_time
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee in callees.get(func, []):
+            if callee in visiting:
+                continue
+            callee_ct = raw[callee][3]
+            edge_ct = raw[callee][4][func][3]
+            if callee_ct <= 0 or edge_ct <= 0:
+                continue
+            visiting.add(callee)
+            walk(callee, path, scale * edge_ct / callee_ct)
+            visiting.discard(callee)
+
+    roots = [func for func, value in raw.items() if not value[4]]
+    for func in roots:
+        visiting = {func}
+        walk(func, [root] if root else [], 1.0)
+
+    return [f"{stack} {value}" for stack, value in sorted(lines.items())]
+
+
+class _StageState:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.allocations = {}  # (filename, lineno) -> [size_diff, count_diff]
+        self.peak = 0
+        self.start_memory = 0
+        self.snapshot = None
+        self.entries = 0
+
+
+class StageProfiler:
+    def __init__(self, output_dir="profile", top_n=20, stage_map=None):
+        """파이프라인 단계별 cProfile / tracemalloc 프로파일러 (metrics span 기반)"""
+        self.logger = logging.getLogger('NewsGenerator')
+        self.output_dir = os.path.join(output_dir, datetime.now().strftime('%Y%m%d_%H%M%S'))
+        self.top_n = top_n
+        self.stage_map = stage_map or STAGE_MAP
+        self._stages = {}
+        self._stack = []
+        self._thread_id = None
+        self._started_tracemalloc = False
+
+    def start(self):
+        """프로파일링 시작 - 이후 실행되는 단계 span 을 수집"""
+        self._thread_id = threading.get_ident()
+        if not tracemalloc.is_tracing():
+            # 할당 위치는 호출 지점 한 줄(lineno)만 집계하므로 프레임 1개만 기록
+            tracemalloc.start(1)
+            self._started_tracemalloc = True
+        get_metrics().add_span_listener(self)
+        self.logger.info("프로파일링 모드 시작 (결과: %s)", self.output_dir)
+
+    def stop(self):
+        get_metrics().remove_span_listener(self)
+        # 실행 중인 단계는 스택 맨 위 하나뿐 (하위 단계 진입 시 상위 단계는 이미 멈춤)
+        if self._stack:
+            self._pause(self._stack[-1])
+            self._stack = []
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _state(self, stage):
+        if stage not in self._stages:
+            self._stages[stage] = _StageState()
+        return self._stages[stage]
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def _resume(self, stage, snapshot=None):
+        """단계 측정 재개 - 직전 단계를 멈출 때 찍은 snapshot 이 있으면 기준선으로 재사용"""
+        state = self._state(stage)
+        state.entries += 1
+        state.snapshot = snapshot if snapshot is not None else self._take_snapshot()
+        tracemalloc.reset_peak()
+        state.start_memory = tracemalloc.get_traced_memory()[0]
+        state.profile.enable()
+
+    def _pause(self, stage):
+        state = self._state(stage)
+        state.profile.disable()
+        peak = tracemalloc.get_traced_memory()[1]
+        snapshot = self._take_snapshot()
+        for diff in snapshot.compare_to(state.snapshot, "lineno"):
+            if not diff.size_diff and not diff.count_diff:
+                continue
+            frame = diff.traceback[0]
+            totals = state.allocations.setdefault((frame.filename, frame.lineno), [0, 0])
+            totals[0] += diff.size_diff
+            totals[1] += diff.count_diff
+        state.peak = max(state.peak, peak - state.start_memory)
+        state.snapshot = None
+        return snapshot
+
+    def span_started(self, name):
+        stage = self.stage_map.get(name)
+        if stage is None or threading.get_ident() != self._thread_id:
+            return
+        if self._stack and self._stack[-1] == stage:
+            # 같은 단계 안의 하위 span (예: layout 안의 get_optimal_font_size)
+            self._stack.append(stage)
+            return
+        snapshot = self._pause(self._stack[-1]) if self._stack else None
+        self._stack.append(stage)
+        self._resume(stage, snapshot)
+
+    def span_finished(self, name):
+        stage = self.stage_map.get(name)
+        if stage is None or threading.get_ident() != self._thread_id or not self._stack:
+            return
+        self._stack.pop()
+        if self._stack and self._stack[-1] == stage:
+            return
+        snapshot = self._pause(stage)
+        if self._stack:
+            self._resume(self._stack[-1], snapshot)
+
+    def _allocation_report(self, stage, state):
+        lines = [f"=== {stage} 단계 메모리 할당 상위 {self.top_n}개 (호출 {state.entries}회) ===",
+                 f"최대 순간 사용량(peak) 증가: {state.peak / 1024:.1f} KiB", ""]
+        top = sorted(state.allocations.items(), key=lambda item: abs(item[1][0]), reverse=True)[:self.top_n]
+        for (filename, lineno), (size_diff, count_diff) in top:
+            lines.append(f"{size_diff / 1024:+10.1f} KiB {count_diff:+8d} blocks  {filename}:{lineno}")
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self):
+        """단계별 pstats, collapsed stack, 할당 요약 파일 저장"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        all_collapsed = []
+        summary = []
+
+        for stage, state in self._stages.items():
+            stats = pstats.Stats(state.profile)
+            stats.dump_stats(os.path.join(self.output_dir, f"{stage}.pstats"))
+
+            collapsed = collapsed_stacks(stats, root=stage)
+            all_collapsed.extend(collapsed)
+            with open(os.path.join(self.output_dir, f"{stage}.collapsed"), "w", encoding="utf-8") as f:
+                f.write("\n".join(collapsed) + "\n")
+
+            allocation_report = self._allocation_report(stage, state)
+            with open(os.path.join(self.output_dir, f"{stage}_alloc.txt"), "w", encoding="utf-8") as f:
+                f.write(allocation_report)
+
+            buffer = io.StringIO()
+            pstats.Stats(state.profile, stream=buffer).sort_stats("cumulative").print_stats(self.top_n)
+            summary.append(f"##### {stage} (총 {stats.total_tt:.3f}초, 호출 {state.entries}회)\n")
+            summary.append(buffer.getvalue())
+            summary.append(allocation_report)
+
+        with open(os.path.join(self.output_dir, "all.collapsed"), "w", encoding="utf-8") as f:
+            f.write("\n".join(all_collapsed) + "\n")
+        with open(os.path.join(self.output_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(summary))
+
+        self.logger.info("프로파일링 결과 저장 완료: %s", self.output_dir)
+        return self.output_dir
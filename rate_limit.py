@@ -0,0 +1,92 @@
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+from metrics import get_metrics
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """초당 rate 개의 토큰이 채워지는 토큰 버킷 (최대 capacity 개까지 버스트 허용)"""
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 대기하고, 대기한 시간(초)을 반환"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    def __init__(self, name, rate=None, burst=None, max_concurrency=None):
+        """API 한 종류에 대한 호출 속도(토큰 버킷)와 동시 실행 수 제한"""
+        self.name = name
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+    @contextmanager
+    def limit(self):
+        metrics = get_metrics()
+        started = time.perf_counter()
+        if self.semaphore is not None:
+            self.semaphore.acquire()
+        try:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            waited = time.perf_counter() - started
+            if waited > 0.001:
+                metrics.observe("rate_limit_wait_seconds", waited, api=self.name)
+            yield
+        finally:
+            if self.semaphore is not None:
+                self.semaphore.release()
+
+
+_limiters = {}
+_lock = threading.Lock()
+
+
+def configure(name, rate=None, burst=None, max_concurrency=None):
+    """API 호출 제한 설정 (예: configure("gemini", rate=0.5, burst=2, max_concurrency=2))"""
+    # 버스트가 1보다 작으면 토큰이 1개도 쌓이지 않아 acquire() 가 끝나지 않음
+    if rate is not None and rate <= 0:
+        raise ValueError(f"{name} 호출 제한의 rate 는 0보다 커야 합니다: {rate}")
+    if burst is not None and burst < 1:
+        raise ValueError(f"{name} 호출 제한의 burst 는 1 이상이어야 합니다: {burst}")
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(f"{name} 호출 제한의 max_concurrency 는 1 이상이어야 합니다: {max_concurrency}")
+    limiter = RateLimiter(name, rate, burst, max_concurrency)
+    with _lock:
+        _limiters[name] = limiter
+    logging.getLogger('NewsGenerator').info(
+        "호출 제한 설정 - %s: 초당 %s회, 버스트 %s, 동시 실행 %s", name, rate, burst, max_concurrency)
+    return limiter
+
+
+@contextmanager
+def limit(name):
+    """설정된 제한에 따라 대기 후 실행 (설정이 없으면 바로 실행)"""
+    with _lock:
+        limiter = _limiters.get(name)
+    if limiter is None:
+        yield
+        return
+    with limiter.limit():
+        yield
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import logging
+import argparse
+from datetime import datetime, time as dt_time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import rate_limit
+from main import (
+    DEFAULT_QUERY,
+    DEFAULT_CAPTION,
+    create_image_server,
+    export_metrics,
+    run_edition,
+)
+from news_fetcher import NewsFetcher
+from news_analyzer import NewsAnalyzer
+from instagram_post import InstagramAPI
+from output_store import OutputStore
+from log_utils import setup_logger
+from metrics import get_metrics
+
+metrics = get_metrics()
+
+
+class Edition:
+    def __init__(self, name, query=DEFAULT_QUERY, max_results=5, caption=DEFAULT_CAPTION, deadline=None,
+                 access_token_env="INSTAGRAM_ACCESS_TOKEN", account_id_env="INSTAGRAM_ACCOUNT_ID"):
+        """에디션 설정 (검색어, 캡션, 게시 계정, 게시 마감 시각)"""
+        self.name = name
+        self.query = query
+        self.max_results = max_results
+        self.caption = caption
+        self.deadline = self._parse_deadline(deadline)
+        self.access_token_env = access_token_env
+        self.account_id_env = account_id_env
+
+    @staticmethod
+    def _parse_deadline(deadline):
+        """"HH:MM" 형식의 마감 시각을 오늘 날짜 기준 datetime 으로 변환 (없으면 가장 마지막)"""
+        if not deadline:
+            return datetime.combine(datetime.now().date(), dt_time.max)
+        hour, minute = (int(part) for part in deadline.split(":"))
+        return datetime.combine(datetime.now().date(), dt_time(hour, minute))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def load_config(path):
+    """에디션 설정 파일(JSON) 로드"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    editions = [Edition.from_dict(edition) for edition in config.get("editions", [])]
+    if not editions:
+        raise ValueError(f"설정 파일에 에디션이 없습니다: {path}")
+    return config, editions
+
+
+class EditionScheduler:
+    def __init__(self, editions, max_workers=2, rate_limits=None):
+        """여러 에디션을 한 프로세스에서 마감 시각 순으로 실행 (캐시와 API 호출 제한 공유)"""
+        self.logger = logging.getLogger('NewsGenerator')
+        # 마감 시각이 이른 에디션부터 실행
+        self.editions = sorted(editions, key=lambda edition: edition.deadline)
+        self.max_workers = max_workers
+
+        # 모든 에디션이 공유하는 API 호출 제한
+        for api, limits in (rate_limits or {}).items():
+            rate_limit.configure(api, **limits)
+
+        # 모든 에디션이 공유하는 자원 (LLM 클라이언트와 분석 캐시, 출력 저장소, 이미지 서버)
+        self.store = OutputStore()
+        self.image_server = create_image_server()
+        self.fetcher = NewsFetcher()
+        self.analyzer = NewsAnalyzer()
+
+    def _run_one(self, edition):
+        self.logger.info("=== 에디션 시작: %s (마감 %s) ===", edition.name, edition.deadline.strftime('%H:%M'))
+        # 기본 계정으로 잘못 게시되지 않도록 에디션별 자격 증명이 없으면 실패 처리
+        access_token = os.getenv(edition.access_token_env)
+        account_id = os.getenv(edition.account_id_env)
+        if not access_token or not account_id:
+            raise ValueError(f"에디션 {edition.name}의 Instagram 자격 증명({edition.access_token_env}, "
+                             f"{edition.account_id_env})이 설정되지 않았습니다.")
+
+        instagram = InstagramAPI(
+            image_server=self.image_server,
+            access_token=access_token,
+            account_id=account_id
+        )
+        with metrics.span("edition", edition=edition.name):
+            return run_edition(
+                query=edition.query,
+                max_results=edition.max_results,
+                caption_template=edition.caption,
+                store=self.store,
+                image_server=self.image_server,
+                fetcher=self.fetcher,
+                analyzer=self.analyzer,
+                instagram=instagram
+            )
+
+    def run(self):
+        """모든 에디션 실행 후 에디션별 결과 반환"""
+        results = {}
+        started = time.perf_counter()
+
+        # 보관 기간이 설정된 경우 오래된 카드 정리 (main.py 단독 실행과 동일)
+        retention_days = os.getenv("OUTPUT_RETENTION_DAYS")
+        if retention_days:
+            self.store.gc(int(retention_days))
+
+        if self.image_server is not None:
+            self.image_server.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Edition") as executor:
+                # 작업 큐는 FIFO 이므로 마감 순서대로 제출하면 이른 마감이 먼저 시작됨
+                futures = {executor.submit(self._run_one, edition): edition for edition in self.editions}
+                for future in as_completed(futures):
+                    edition = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.logger.error("에디션 %s 처리 중 오류 발생: %s", edition.name, e)
+                        result = {"success": False, "error": str(e)}
+
+                    status = "success" if result.get("success") else "failure"
+                    metrics.inc("editions_total", status=status)
+                    if datetime.now() > edition.deadline:
+                        metrics.inc("editions_late_total")
+                        self.logger.warning("에디션 %s 마감 시각(%s)을 넘겨 완료되었습니다.",
+                                            edition.name, edition.deadline.strftime('%H:%M'))
+                    results[edition.name] = result
+        finally:
+            if self.image_server is not None:
+                self.image_server.stop()
+
+        succeeded = sum(1 for result in results.values() if result.get("success"))
+        self.logger.info("에디션 %s개 중 %s개 성공 (%.1f초)", len(results), succeeded, time.perf_counter() - started)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 에디션을 한 프로세스에서 실행하는 스케줄러")
+    parser.add_argument("config", help="에디션 설정 파일 (JSON)")
+    parser.add_argument("--max-workers", type=int, default=None, help="동시에 실행할 에디션 수")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        metrics.serve(int(metrics_port))
+
+    try:
+        config, editions = load_config(args.config)
+        scheduler = EditionScheduler(
+            editions,
+            max_workers=args.max_workers or config.get("max_workers", 2),
+            rate_limits=config.get("rate_limits")
+        )
+        scheduler.run()
+    except Exception as e:
+        logger.error("스케줄러 실행 중 오류 발생: %s", e)
+    finally:
+        export_metrics()
+
+
+if __name__ == "__main__":
+    main()